@@ -0,0 +1,18 @@
+# Shared JSON shim: orjson when it's installed, stdlib json otherwise.
+# orjson encodes and decodes several times faster and emits bytes directly;
+# the stdlib fallback mirrors its compact, UTF-8 output so both paths write
+# the same shape of file. Every module used to paste its own copy of this
+# try/except — keeping it here means the fallback semantics can't drift
+# per file.
+import json
+
+try:
+    import orjson
+
+    dumps = orjson.dumps
+    loads = orjson.loads
+except ImportError:
+    def dumps(data) -> bytes:
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    loads = json.loads
@@ -1,44 +1,145 @@
 # Import various necessary modules for bot logic and data handling
-from voxcoinbot import logger, load_data, save_data, update_chat_user, get_chat
-from datetime import datetime, timedelta
+from voxcoinbot import logger, load_data, mark_dirty, get_chat, _username_index
+import heapq
+import itertools
+import os
 import random
-import json
+import time
 from pathlib import Path
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, CommandHandler, MessageHandler, filters, CallbackQueryHandler
 
+# JSON via the shared orjson-or-stdlib shim (see modules/_json)
+from modules._json import dumps as _dumps, loads as _loads
+
 # Set up file paths for storing casino-related data
 BASE_DIR = Path(__file__).resolve().parent
 QUOTA_FILE = BASE_DIR / 'casino_quota.json'      # User limits (cooldowns)
-STATS_FILE = BASE_DIR / 'casino_stats.json'      # Game statistics
 DATA_FILE  = BASE_DIR / 'casino_data.json'       # Placeholder (not actively used in this code)
 
-# Create these files if they don't exist, filling them with default content
-for fp, initial in [
-    (QUOTA_FILE, {}),  # Empty dict for quotas
-    (STATS_FILE, {"slots": {}, "roulette": {}, "dice": {}}),  # Game categories with empty stats
-    (DATA_FILE, {})     # Just an empty object
-]:
-    if not fp.exists():
-        fp.write_text(json.dumps(initial, ensure_ascii=False, indent=2), encoding='utf-8')
+# Defaults for files that don't exist yet. Instead of stat-ing and
+# possibly writing every file at import time on each restart, missing
+# files simply load as their default and get created on the first flush.
+_DEFAULTS = {
+    QUOTA_FILE: {},  # Empty dict for quotas
+    DATA_FILE: {}     # Just an empty object
+}
 
-# Load JSON data from file
+# Load JSON data from file (missing file → its default, created lazily)
 def load_json(fp: Path):
-    return json.loads(fp.read_text(encoding='utf-8'))
+    try:
+        return _loads(fp.read_bytes())
+    except FileNotFoundError:
+        return dict(_DEFAULTS.get(fp, {}))
 
-# Save data into JSON file
+# Save data into JSON file (compact — these files are machine-read only,
+# and pretty-printing is 2-3x slower and roughly doubles the bytes written).
+# Writes go to a temp file first and are swapped in with os.replace, so a
+# crash mid-write can never leave a half-written file behind.
 def save_json(fp: Path, data):
-    fp.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding='utf-8')
+    tmp = fp.with_suffix(fp.suffix + '.tmp')
+    tmp.write_bytes(_dumps(data))
+    os.replace(tmp, fp)
+
+# Quota lives in memory: loaded once here, mutated directly by the game
+# handlers, and flushed to disk by a background job (see _flush_files).
+# This keeps the hot path (every /slots spin) free of file I/O.
+# (Game stats used to have their own file; they now ride along in the
+# main data blob under each chat's 'stats' key.)
+_QUOTA = load_json(QUOTA_FILE)
+_dirty_quota = False
+
+# Background job: write the in-memory quota back to disk, but only if
+# something actually changed since the last flush. Compact JSON (no
+# indent) — the file is machine-read only, so one single write is enough.
+async def _flush_files(context: ContextTypes.DEFAULT_TYPE):
+    global _dirty_quota
+    try:
+        if _dirty_quota:
+            save_json(QUOTA_FILE, _QUOTA)  # Atomic temp-file + rename write
+            _dirty_quota = False
+    except Exception:
+        logger.exception("Failed to flush casino quota")
+
+# The main bot data blob is cached process-wide by voxcoinbot: load_data()
+# hands back the shared in-memory dict and mark_dirty() queues it for the
+# main flush job. The casino used to wrap its own cache + flush around the
+# same dict, which meant a second 2-second job rewriting the same file.
+
+# Walk to the user's record in a single pass. update_chat_user + get_chat
+# would traverse the same chat/user dicts twice; this runs on every game
+# command and every reward message, so one walk is worth having.
+def _get_or_create_user(data: dict, chat_id: str, user):
+    chat = data['chats'].setdefault(chat_id, {'users': {}, 'privileged': []})
+    uid = str(user.id)
+    user_rec = chat['users'].get(uid)
+    name = user.username or user.full_name
+    if user_rec is None:
+        user_rec = chat['users'][uid] = {
+            'username': name,
+            'balance': 0,
+            'voxcent': 0,
+            'tvcoin': 0
+        }
+        _username_index(chat)[('@' + name).lower()] = uid
+        mark_dirty()
+    elif user_rec['username'] != name:
+        # Keep the name fresh AND keep the @mention index in step — a
+        # stale entry here would send /payto money to the old handle
+        idx = _username_index(chat)
+        old_name = user_rec['username']
+        if old_name:
+            idx.pop(('@' + old_name).lower(), None)
+        user_rec['username'] = name
+        idx[('@' + name).lower()] = uid
+        mark_dirty()
+    return chat, user_rec
 
 # Helper to get user record and chat context from bot data
-def get_user_record(update: Update):
+def get_user_record(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = str(update.effective_chat.id)
     user_id = str(update.effective_user.id)
-    data = load_data()  # Load all persistent data
-    update_chat_user(data, chat_id, update.effective_user)  # Ensure user info is fresh
-    user_rec = get_chat(data, chat_id)['users'][user_id]  # Get specific user info
+    data = load_data()
+    _, user_rec = _get_or_create_user(data, chat_id, update.effective_user)
     return data, user_rec, chat_id, user_id
 
+# Top-gamblers index: instead of re-sorting every user in the chat each time
+# the leaderboard button is clicked (O(U log U) per click), keep a tiny
+# per-chat map of the top voxcent holders and update it whenever a handler
+# changes someone's voxcent. Seeded lazily with one full scan per chat.
+_TOP_K = 5
+_LEADERBOARD: dict = {}   # chat_id -> {user_id: voxcent}
+
+def _update_leaderboard(chat_id: str, user_id: str, voxcent):
+    board = _LEADERBOARD.get(chat_id)
+    if board is None:
+        return  # Not seeded yet — the first leaderboard click will build it
+    board[user_id] = voxcent
+    if len(board) > _TOP_K:
+        del board[min(board, key=board.get)]
+
+def _get_leaderboard(chat_id: str, users: dict) -> list:
+    board = _LEADERBOARD.get(chat_id)
+    if board is None:
+        # One full scan to seed the index; afterwards updates are O(1)
+        top = heapq.nlargest(
+            _TOP_K, users.items(),
+            key=lambda item: item[1].get('voxcent', 0)
+        )
+        board = _LEADERBOARD[chat_id] = {
+            uid: rec.get('voxcent', 0) for uid, rec in top
+        }
+    else:
+        # Re-read the values from the live records at render time: bulk
+        # edits like /cmp rewrite everyone's voxcent without going through
+        # _update_leaderboard, so the cached numbers can lag. This keeps
+        # the O(1)-per-bet membership tracking but never shows stale
+        # amounts.
+        for uid in board:
+            rec = users.get(uid)
+            board[uid] = rec.get('voxcent', 0) if rec else 0
+    return sorted(board.items(), key=lambda kv: kv[1], reverse=True)
+
 # Show the main casino menu with inline buttons
 async def casino_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     keyboard = [
@@ -62,19 +163,15 @@ async def menu_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     elif choice == 'roulette':
         await query.edit_message_text("Type /roulette [number 0-36, bet]")
     elif choice == 'leaderboard':
-        data = load_data()
-        chat = get_chat(data, str(update.effective_chat.id))
+        chat_id = str(update.effective_chat.id)
+        chat = get_chat(load_data(), chat_id)
         # Get the top 5 users with the most voxcent (gambling currency)
-        top = sorted(
-            chat['users'].items(),
-            key=lambda item: item[1].get('voxcent', 0),
-            reverse=True
-        )[:5]
+        top = _get_leaderboard(chat_id, chat['users'])
         lines = []
-        for idx, (uid, user_rec) in enumerate(top, start=1):
+        for idx, (uid, vc) in enumerate(top, start=1):
+            user_rec = chat['users'].get(uid, {})
             username = user_rec.get('username') or user_rec.get('first_name', 'User')
             mention = f"[{username}](tg://user?id={uid})"
-            vc = user_rec.get('voxcent', 0)
             lines.append(f"{idx}. {mention} — {vc} voxcent")
         text = "🏅 Top Gamblers:\n" + "\n".join(lines)
         await query.edit_message_text(text, parse_mode="Markdown")
@@ -82,15 +179,31 @@ async def menu_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 # Define slot machine emojis and payout multipliers
 EMOJI_COMMON = ['🍒','🍋','🍊','🍉']        # Common emojis
 EMOJI_RARE   = ['💎','👑']                  # Rare emojis with high payouts
-ALL_EMOJI    = EMOJI_COMMON*4 + EMOJI_RARE  # Common emojis appear more frequently
+# Common emojis appear more frequently; frozen once so sampling doesn't rebuild it
+ALL_EMOJI    = tuple(EMOJI_COMMON*4 + EMOJI_RARE)
 PAYOUTS      = {
     **{e: (8,2) for e in EMOJI_COMMON},     # 3 symbols → x8, 2 symbols → x2
     **{e: (50,5) for e in EMOJI_RARE}       # Rare: 3 symbols → x50, 2 symbols → x5
 }
 
+# A spin only ever produces 3 symbols, so the set of possible outcomes is
+# tiny. Precompute the multiplier for every sorted triple once at import,
+# so the handler does one sort + one dict lookup instead of counting
+# symbols and allocating a set/dict per spin.
+_PAYOUT_TABLE = {}
+for _combo in itertools.combinations_with_replacement(sorted(set(ALL_EMOJI)), 3):
+    _mult = 0
+    for _sym in set(_combo):
+        _cnt = _combo.count(_sym)
+        if _cnt >= 2:
+            _mult = PAYOUTS[_sym][1] if _cnt == 2 else PAYOUTS[_sym][0]
+            break
+    _PAYOUT_TABLE[_combo] = _mult
+
 # Slot machine logic
 async def slots(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    data, user_rec, chat_id, user_id = get_user_record(update)
+    global _dirty_quota
+    data, user_rec, chat_id, user_id = get_user_record(update, context)
     try:
         stake = max(50, int(context.args[0]))  # Minimum bet = 50
     except:
@@ -98,37 +211,31 @@ async def slots(update: Update, context: ContextTypes.DEFAULT_TYPE):
     balance = user_rec.get('voxcent',0)
     if balance < stake:
         return await update.message.reply_text(f"Not enough balance ({balance} voxcent)")
-    
-    # Load spin quota (limit to 5 spins per 6 hours)
-    quota = load_json(QUOTA_FILE)
-    user_q = quota.setdefault(chat_id, {}).setdefault(user_id, {"slots": {"count":5, "last_ts":None}})
-    now = datetime.utcnow().timestamp()
+
+    # Check spin quota (limit to 5 spins per 6 hours) — in-memory, no file read
+    user_q = _QUOTA.setdefault(chat_id, {}).setdefault(user_id, {"slots": {"count":5, "last_ts":None}})
+    now = time.time()  # Same POSIX timestamp, without building a datetime first
     if not user_q['slots']['last_ts'] or now - user_q['slots']['last_ts'] >= 6*3600:
         user_q['slots'] = {"count":5, "last_ts":now}
     if user_q['slots']['count'] <= 0:
         return await update.message.reply_text("⏳ Slot limit reached.")
     
-    # Spin the slot machine: pick 3 emojis
-    reels = [random.choice(ALL_EMOJI) for _ in range(3)]
-    counts = {r: reels.count(r) for r in set(reels)}
-    multiplier = 0
-    for sym, cnt in counts.items():
-        if cnt >= 2:
-            multiplier = PAYOUTS[sym][1] if cnt == 2 else PAYOUTS[sym][0]
-            break
+    # Spin the slot machine: pick 3 emojis in one call instead of three
+    reels = random.choices(ALL_EMOJI, k=3)
+    multiplier = _PAYOUT_TABLE.get(tuple(sorted(reels)), 0)
     reward = stake * multiplier
     user_rec['voxcent'] = balance - stake + reward
-    save_data(data)
+    _update_leaderboard(chat_id, user_id, user_rec['voxcent'])
+    mark_dirty()
 
-    # Update statistics (net gain/loss)
-    stats = load_json(STATS_FILE)
-    stats['slots'].setdefault(chat_id, {}).setdefault(user_id, 0)
-    stats['slots'][chat_id][user_id] += reward - stake
-    save_json(STATS_FILE, stats)
+    # Update statistics (net gain/loss) — stored in the main data blob,
+    # so it rides along with the same save as the voxcent change
+    slot_stats = data['chats'][chat_id].setdefault('stats', {}).setdefault('slots', {})
+    slot_stats[user_id] = slot_stats.get(user_id, 0) + reward - stake
 
-    # Decrease spin quota and save
+    # Decrease spin quota — flushed later by _flush_files
     user_q['slots']['count'] -= 1
-    save_json(QUOTA_FILE, quota)
+    _dirty_quota = True
 
     # Prepare result message
     bar = ' | '.join(reels)
@@ -138,9 +245,14 @@ async def slots(update: Update, context: ContextTypes.DEFAULT_TYPE):
         res = f"[ {bar} ]\n💔 Lost {stake} voxcent"
     await update.message.reply_text(res)
 
+# Dedicated RNG with a bound-method alias so each roll skips the
+# module-level attribute lookup on random.randint
+_rng = random.Random()
+_randint = _rng.randint
+
 # Dice game: 1-6 roll, win if 1 or 6 (x3 payout)
 async def dice(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    data, user_rec, *_ = get_user_record(update)
+    data, user_rec, chat_id, user_id = get_user_record(update, context)
     try:
         stake = max(50, int(context.args[0]))
     except:
@@ -148,7 +260,7 @@ async def dice(update: Update, context: ContextTypes.DEFAULT_TYPE):
     bal = user_rec.get('voxcent', 0)
     if bal < stake:
         return await update.message.reply_text(f"Not enough balance ({bal} voxcent)")
-    roll = random.randint(1, 6)
+    roll = _randint(1, 6)
     if roll in (1, 6):
         prize = stake * 3
         result = f"Rolled: {roll}. 🎉 You win {prize} voxcent"
@@ -156,12 +268,13 @@ async def dice(update: Update, context: ContextTypes.DEFAULT_TYPE):
         prize = 0
         result = f"Rolled: {roll}. 💔 Lost {stake} voxcent"
     user_rec['voxcent'] = bal - stake + prize
-    save_data(data)
+    _update_leaderboard(chat_id, user_id, user_rec['voxcent'])
+    mark_dirty()
     await update.message.reply_text(result)
 
 # Roulette: guess number (0–36), x35 if exact, x2 if parity matches
 async def roulette(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    data, user_rec, *_ = get_user_record(update)
+    data, user_rec, chat_id, user_id = get_user_record(update, context)
     try:
         num = int(context.args[0])
         stake = int(context.args[1])
@@ -171,7 +284,7 @@ async def roulette(update: Update, context: ContextTypes.DEFAULT_TYPE):
     bal = user_rec.get('voxcent', 0)
     if bal < stake:
         return await update.message.reply_text(f"Not enough balance ({bal} voxcent)")
-    result = random.randint(0, 36)
+    result = _randint(0, 36)
     if result == num:
         prize = stake * 35
         res = f"Roulette: {result}. 🎉 Jackpot! {prize} voxcent"
@@ -182,17 +295,47 @@ async def roulette(update: Update, context: ContextTypes.DEFAULT_TYPE):
         prize = 0
         res = f"Roulette: {result}. 💔 Lost {stake} voxcent"
     user_rec['voxcent'] = bal - stake + prize
-    save_data(data)
+    _update_leaderboard(chat_id, user_id, user_rec['voxcent'])
+    mark_dirty()
     await update.message.reply_text(res)
 
-# Passive reward: every non-command message gives 1 voxcent
+# Per-user throttle for the passive reward: at most one voxcent every 3
+# seconds, so a message storm can't turn into a write storm
+_REWARD_COOLDOWN = 3.0
+_LAST_REWARD: dict = {}   # (chat_id, user_id) -> time.monotonic() of last reward
+
+# Dispatch-time filter for the passive reward: checks "is text, long
+# enough, not a command" in one method, so PTB skips creating and
+# scheduling the coroutine entirely for messages that can't earn anything
+class _RewardableText(filters.MessageFilter):
+    def filter(self, message):
+        t = message.text
+        return bool(t) and len(t) > 10 and t[0] != '/'
+
+# Passive reward: every qualifying message gives 1 voxcent
+# (the _RewardableText filter has already rejected short/command messages)
 async def reward_voxcent(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    text = (update.message.text or '')
-    if len(text) <= 10 or text.startswith('/'):
+    # Cheap early exit before touching any data: two dict lookups + compare
+    key = (str(update.effective_chat.id), str(update.effective_user.id))
+    now = time.monotonic()
+    last = _LAST_REWARD.get(key)
+    if last is not None and now - last < _REWARD_COOLDOWN:
         return
-    data, user_rec, _, _ = get_user_record(update)
+    _LAST_REWARD[key] = now
+    data, user_rec, chat_id, user_id = get_user_record(update, context)
     user_rec['voxcent'] = user_rec.get('voxcent', 0) + 1
-    save_data(data)
+    _update_leaderboard(chat_id, user_id, user_rec['voxcent'])
+    mark_dirty()
+
+# Final flush on graceful shutdown: the debounced quota job means there can
+# be up to a few seconds of mutations still only in memory when the bot
+# stops — write them out once before the process exits. (The main data
+# blob is flushed by voxcoinbot's own job and atexit hook.)
+async def _final_flush(app):
+    global _dirty_quota
+    if _dirty_quota:
+        save_json(QUOTA_FILE, _QUOTA)
+        _dirty_quota = False
 
 # Register all commands and handlers with the app
 def register_handlers(app):
@@ -201,4 +344,9 @@ def register_handlers(app):
     app.add_handler(CommandHandler('slots', slots))
     app.add_handler(CommandHandler('dice', dice))
     app.add_handler(CommandHandler('roulette', roulette))
-    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, reward_voxcent), group=100)
+    app.add_handler(MessageHandler(_RewardableText(), reward_voxcent), group=100)
+    # Flush in-memory quota/stats to disk every few seconds (only when dirty)
+    app.job_queue.run_repeating(_flush_files, interval=5, first=5)
+    # One last flush when the application stops (run_polling invokes this
+    # on SIGINT/SIGTERM too), so debouncing never loses the tail writes
+    app.post_stop = _final_flush
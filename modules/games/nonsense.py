@@ -1,5 +1,4 @@
 # Import necessary modules
-import json
 import random
 from pathlib import Path
 from telegram import Update
@@ -7,6 +6,9 @@ from telegram.ext import ContextTypes, CommandHandler
 from telegram.constants import ParseMode
 from voxcoinbot import load_data, save_data  # Custom functions to handle bot data
 
+# JSON via the shared orjson-or-stdlib shim (see modules/_json)
+from modules._json import dumps as _dumps, loads as _loads
+
 # Define the path to the template file (where question sets are stored)
 BASE_DIR = Path(__file__).resolve().parent
 TEMPLATES_FILE = BASE_DIR / 'nonsense_templates.json'
@@ -52,18 +54,26 @@ default_templates = [
 
 # If the template file doesn't exist, write the default templates into it
 if not TEMPLATES_FILE.exists():
-    TEMPLATES_FILE.write_text(json.dumps(default_templates, ensure_ascii=False, indent=2), encoding='utf-8')
+    TEMPLATES_FILE.write_bytes(_dumps(default_templates))
 
 # Load templates from file
 def load_templates():
-    return json.loads(TEMPLATES_FILE.read_text(encoding='utf-8'))
+    return _loads(TEMPLATES_FILE.read_bytes())
+
+# Templates never change while the bot is running, so read them once at
+# import instead of re-parsing the file on every /start_nonsense
+TEMPLATES = load_templates()
+
+# Who currently owes an answer, and for which chat/question. This is
+# transient UI state, so it lives in memory only — keeping it inside
+# data.json meant a full JSON rewrite every time a question was asked.
+_PENDING: dict = {}   # user_id -> {'chat_id': ..., 'q_idx': ...}
 
 # /start_nonsense — starts a new game of Nonsense in the chat
 async def start_nonsense(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = str(update.effective_chat.id)
     data = load_data()
-    templates = load_templates()
-    questions = random.choice(templates)  # Pick a random question set
+    questions = random.choice(TEMPLATES)  # Pick a random question set
     # Register the game in memory
     data.setdefault('nonsense_games', {})[chat_id] = {
         'questions': questions,
@@ -85,12 +95,13 @@ async def nonsense_join(update: Update, context: ContextTypes.DEFAULT_TYPE):
     game = data.get('nonsense_games', {}).get(chat_id)
     if not game:
         return await update.message.reply_text("No active game. Start one with /start_nonsense")
-    if user_id in game['participants']:
+    participants = game['participants']  # One lookup instead of three below
+    if user_id in participants:
         return await update.message.reply_text("You're already in the game.")
-    game['participants'].append(user_id)
+    participants.append(user_id)
     save_data(data)
     await update.message.reply_text(
-        f"✅ You’re registered! Total players: {len(game['participants'])}."
+        f"✅ You’re registered! Total players: {len(participants)}."
     )
 
 # /nonsense_begin — begins asking questions to the players
@@ -102,11 +113,12 @@ async def nonsense_begin(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return await update.message.reply_text("No active game. Start one with /start_nonsense")
     if not game['participants']:
         return await update.message.reply_text("No participants yet. Use /nonsense_join first.")
-    await _ask_next_question(chat_id, context)
+    await _ask_next_question(chat_id, context, data)
 
-# Internal function: sends the next question to the correct player in the game
-async def _ask_next_question(chat_id: str, context: ContextTypes.DEFAULT_TYPE):
-    data = load_data()
+# Internal function: sends the next question to the correct player in the game.
+# Works on the caller's already-loaded `data` so each answered question costs
+# one save instead of a second full load+save round trip.
+async def _ask_next_question(chat_id: str, context: ContextTypes.DEFAULT_TYPE, data: dict):
     game = data['nonsense_games'][chat_id]
     idx = game.get('current_q', 0)  # Current question index
     questions = game['questions']
@@ -114,17 +126,15 @@ async def _ask_next_question(chat_id: str, context: ContextTypes.DEFAULT_TYPE):
     
     # If all questions have been asked, reveal the full story
     if idx >= len(questions):
-        await _reveal_story(chat_id, context)
+        await _reveal_story(chat_id, context, data)
         return
 
     # Determine which participant should answer next
     user_id = participants[idx % len(participants)]
     q_text = questions[idx]
     
-    # Store pending question info to track direct message replies
-    data.setdefault('nonsense_pending', {})[user_id] = {'chat_id': chat_id, 'q_idx': idx}
-    game['current_q'] = idx  # Save current question index
-    save_data(data)
+    # Remember who we're waiting on (memory only, nothing written to disk)
+    _PENDING[user_id] = {'chat_id': chat_id, 'q_idx': idx}
 
     mention = f"[player](tg://user?id={user_id})"
     await context.bot.send_message(
@@ -138,11 +148,10 @@ async def nonsense_dm(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if update.effective_chat.type != 'private':
         return  # Only allow responses via private messages
     user_id = str(update.effective_user.id)
-    data = load_data()
-    pend = data.get('nonsense_pending', {})
-    info = pend.get(user_id)
+    info = _PENDING.get(user_id)
     if not info:
         return await update.message.reply_text("You don't have a question to answer.")
+    data = load_data()
     chat_id = info['chat_id']
     q_idx = info['q_idx']
     
@@ -159,22 +168,26 @@ async def nonsense_dm(update: Update, context: ContextTypes.DEFAULT_TYPE):
         'answer': answer
     })
 
-    # Clear the pending question and move to next
-    del pend[user_id]
+    # Clear the pending question and move to next.
+    # One save covers the stored answer and the new question index.
+    del _PENDING[user_id]
     game['current_q'] = q_idx + 1
     save_data(data)
     await update.message.reply_text("✅ Answer received!")
-    await _ask_next_question(chat_id, context)
+    await _ask_next_question(chat_id, context, data)
 
 # When all questions are answered, this sends the final story to the group
-async def _reveal_story(chat_id: str, context: ContextTypes.DEFAULT_TYPE):
-    data = load_data()
+async def _reveal_story(chat_id: str, context: ContextTypes.DEFAULT_TYPE, data: dict):
     game = data['nonsense_games'].pop(chat_id)  # Remove the game record
-    lines = []
+    # Build the story with one append per answer and a single join at the
+    # end — no intermediate mention strings or joined sub-lists
+    parts = ["📖 Final Nonsense Story:"]
     for idx, item in enumerate(game['answers'], start=1):
-        mention = f"[player](tg://user?id={item['user_id']})"
-        lines.append(f"{idx}. {item['question']}\n→ {item['answer']} (by {mention})")
-    text = "📖 Final Nonsense Story:\n" + "\n\n".join(lines)
+        parts.append(
+            f"\n\n{idx}. {item['question']}\n→ {item['answer']}"
+            f" (by [player](tg://user?id={item['user_id']}))"
+        )
+    text = ''.join(parts)
     await context.bot.send_message(
         chat_id=chat_id,
         text=text,
@@ -1,108 +1,304 @@
 # Importing standard libraries
+import asyncio          # Background flushing of game state off the event loop
+import atexit           # Final state flush when the process exits
+import mmap             # Zero-copy reads of the game-state files
+import os               # Atomic file replacement when saving game state
 import random           # Used to shuffle the deck and randomize choices
+import tempfile         # Unique temp names for atomic state writes
 import time             # Used for sleep delays in fallback error cases
-import json             # For reading/writing JSON game state
 import logging          # For logging errors and activity
 
 # Path and typing support
+from collections import Counter             # Hands are multisets of cards
 from pathlib import Path                    # Used to locate and work with files
 from typing import Tuple, List              # Type hints for function inputs/outputs
 from datetime import datetime, timedelta, timezone  # Managing time and inactivity
 
 # Telegram bot library
 from telegram import Update
+from telegram.error import Forbidden
 from telegram.ext import ContextTypes, CommandHandler
 
 # Logger from the main bot file
 from voxcoinbot import logger
 
+# JSON via the shared orjson-or-stdlib shim (see modules/_json). Output is
+# compact and timestamps stay as ISO strings in the file, so both encoders
+# produce the same format.
+from modules._json import dumps as _dumps, loads as _loads
+
 # Set up file paths
 BASE_DIR    = Path(__file__).resolve().parent                # Path to the current file's directory
 STATS_FILE  = BASE_DIR / "uno_stats.json"                   # File where player win statistics are stored
 
-# If the stats file doesn't exist yet — create an empty one
-if not STATS_FILE.exists():
-    STATS_FILE.write_text(json.dumps({}, ensure_ascii=False), encoding="utf-8")
+# Player win statistics stay resident in memory after the first use.
+# A winning play used to parse and rewrite the whole stats file inline;
+# now it mutates the cached dict and the background flush persists it.
+_STATS_CACHE = None
+_stats_dirty = False
 
-# Function to load player statistics from file
+# Returns the in-memory statistics, reading the file once lazily
 def load_stats():
-    return json.loads(STATS_FILE.read_text(encoding="utf-8"))
-
-# Function to save player statistics to file
-def save_stats(stats):
-    STATS_FILE.write_text(json.dumps(stats, ensure_ascii=False, indent=2), encoding="utf-8")
+    global _STATS_CACHE
+    if _STATS_CACHE is None:
+        _STATS_CACHE = _loads(STATS_FILE.read_bytes()) if STATS_FILE.exists() else {}
+    return _STATS_CACHE
+
+# Marks the statistics as needing a flush (they're already mutated in place)
+def save_stats(stats=None):
+    global _stats_dirty
+    _stats_dirty = True
+
+# Records one win. Never touches the disk — the background flush picks
+# the change up on its next pass.
+def bump_win(cid, uid):
+    chat_stats = load_stats().setdefault(str(cid), {})
+    uid = str(uid)
+    chat_stats[uid] = chat_stats.get(uid, 0) + 1
+    save_stats()
+
+# Write-then-rename with a unique temp name per call: a crash mid-write
+# leaves the old file intact instead of a truncated half, and overlapping
+# writers (two instances of the flush job, or the job racing the shutdown
+# flush) can't truncate each other's temp before the rename.
+def _atomic_write(path: Path, payload: bytes):
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.unlink(tmp)  # Don't leave orphaned temp files behind
+        except OSError:
+            pass
+        raise
+
+def _flush_stats():
+    global _stats_dirty
+    if _stats_dirty:
+        _stats_dirty = False
+        _atomic_write(STATS_FILE, _dumps(_STATS_CACHE))
+
+# File to store ongoing games. When msgspec is installed the state is kept
+# as MessagePack (much faster to encode/decode than JSON and smaller on
+# disk — the files are machine-only, so readability costs nothing);
+# without it, plain JSON keeps working. State is sharded into one sidecar
+# file per chat under uno_games/, so a card play in one chat only rewrites
+# that chat's file instead of re-serializing every game in every chat.
+# A legacy monolithic uno_games.json/.mpk is still read on first boot.
+GAMES_FILE = BASE_DIR / "uno_games.json"     # Legacy monolith (migration only)
+GAMES_MPK_FILE = BASE_DIR / "uno_games.mpk"  # Legacy monolith (migration only)
+GAMES_DIR = BASE_DIR / "uno_games"           # One file per chat lives here
+
+try:
+    import msgspec.msgpack
+    _HAS_MSGSPEC = True
+except ImportError:
+    _HAS_MSGSPEC = False
+
+_EXT = ".mpk" if _HAS_MSGSPEC else ".json"
+
+def _encode(obj) -> bytes:
+    return msgspec.msgpack.encode(obj) if _HAS_MSGSPEC else _dumps(obj)
+
+# Parse a state file by mmap-ing it: the decoder reads straight out of the
+# kernel page cache instead of copying the whole blob into a bytes object
+# first. Matters most for a large legacy monolith on cold start.
+def _decode_file(path: Path):
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as buf:
+                if path.suffix == ".mpk":
+                    return msgspec.msgpack.decode(buf)
+                try:
+                    return _loads(buf)        # orjson parses buffers directly
+                except TypeError:
+                    return _loads(bytes(buf)) # stdlib json needs real bytes
+
+def _game_path(cid) -> Path:
+    return GAMES_DIR / f"{cid}{_EXT}"
+
+# Turn one in-memory game into its serializable form (lists, ISO strings)
+def _serialize_game(g: dict) -> dict:
+    return {
+        "players": g["players"],
+        "hands": {
+            # Counters flatten back to a plain list of card indices on disk
+            str(uid): list(cards.elements())
+            for uid, cards in g["hands"].items()
+        },
+        "deck": list(g["deck"]),
+        "pile": list(g["pile"]),
+        "current": g["current"],
+        "direction": g["direction"],
+        "current_color": g["current_color"],
+        "started": g["started"],
+        "last_active": g["last_active"].isoformat(),  # Convert datetime to ISO string
+    }
 
-# File to store ongoing games
-GAMES_FILE = BASE_DIR / "uno_games.json"
+# Inverse of _serialize_game: restore tuples and the datetime.
+# players_index is derived here rather than persisted — it's just the
+# players list seen as uid -> position for O(1) membership checks.
+def _deserialize_game(g: dict) -> dict:
+    return {
+        "players": g["players"],  # List of player IDs
+        "players_index": {uid: i for i, uid in enumerate(g["players"])},
+        "hands": {
+            int(uid): Counter(map(_card_in, cards))  # Multiset of card indices
+            for uid, cards in g["hands"].items()
+        },
+        "deck": bytearray(map(_card_in, g["deck"])),  # Remaining cards in deck
+        "pile": bytearray(map(_card_in, g["pile"])),  # Discard pile
+        "current": g["current"],                         # Index of current player
+        "direction": g["direction"],                     # 1 = clockwise, -1 = counter-clockwise
+        "current_color": g["current_color"],             # Color currently in play
+        "started": g["started"],                         # Has the game started?
+        "last_active": datetime.fromisoformat(g["last_active"]),  # Parse timestamp
+    }
 
 def load_games():
     """
-    Loads all active UNO games from file into memory.
-    Deserializes JSON into the global dictionary GAMES,
-    converting string keys and date strings back into usable Python objects.
+    Loads all active UNO games into memory from the per-chat sidecar files.
+    Falls back to the legacy monolithic file when no sidecars exist yet
+    (that state gets re-sharded on the next save).
     """
     global GAMES
-    if GAMES_FILE.exists():
-        try:
-            raw = json.loads(GAMES_FILE.read_text(encoding="utf-8"))
-            new_games = {}
-            for cid_str, g in raw.items():
-                cid = int(cid_str)  # Convert chat ID string back to int
-                new_games[cid] = {
-                    "players": g["players"],  # List of player IDs
-                    "hands": {
-                        int(uid): [tuple(card) for card in cards]  # Convert hands back to tuples
-                        for uid, cards in g["hands"].items()
-                    },
-                    "deck": [tuple(card) for card in g["deck"]],     # Remaining cards in deck
-                    "pile": [tuple(card) for card in g["pile"]],     # Discard pile
-                    "current": g["current"],                         # Index of current player
-                    "direction": g["direction"],                     # 1 = clockwise, -1 = counter-clockwise
-                    "current_color": g["current_color"],             # Color currently in play
-                    "started": g["started"],                         # Has the game started?
-                    "last_active": datetime.fromisoformat(g["last_active"]),  # Parse timestamp
-                }
-            GAMES = new_games
-            logger.info(f"[UNO] Loaded {len(GAMES)} games from file")
-        except Exception as e:
-            logger.exception(f"Failed to load UNO games state: {e}")
-            if not GAMES:
-                GAMES = {}
-    else:
+    new_games = {}
+    try:
+        if GAMES_DIR.is_dir():
+            for path in GAMES_DIR.iterdir():
+                if path.suffix not in (".json", ".mpk"):
+                    continue
+                try:
+                    raw_game = _decode_file(path)
+                    if raw_game is not None:
+                        new_games[int(path.stem)] = _deserialize_game(raw_game)
+                except Exception:
+                    logger.exception("Failed to load UNO game file %s", path.name)
+        migrated = False
+        if not new_games:
+            # Legacy monolithic state from before the per-chat sharding
+            raw = None
+            if _HAS_MSGSPEC and GAMES_MPK_FILE.exists():
+                raw = _decode_file(GAMES_MPK_FILE)
+            elif GAMES_FILE.exists():
+                raw = _decode_file(GAMES_FILE)
+            if raw:
+                for cid_str, g in raw.items():
+                    new_games[int(cid_str)] = _deserialize_game(g)
+                migrated = True
+        GAMES = new_games
+        if migrated:
+            # Re-shard right away and retire the monolith. Finished games
+            # remove their sidecars, so if the monolith stayed around, a
+            # later restart with zero active games would fall back to it
+            # and resurrect games that already ended (same retirement the
+            # flood module does for its legacy flood_memory.json).
+            save_games()
+            if all(_game_path(cid).exists() for cid in GAMES):
+                GAMES_MPK_FILE.unlink(missing_ok=True)
+                GAMES_FILE.unlink(missing_ok=True)
+        logger.info("[UNO] Loaded %d games from file", len(GAMES))
+    except Exception as e:
+        logger.exception(f"Failed to load UNO games state: {e}")
         if not GAMES:
             GAMES = {}
-        logger.info("[UNO] No games file found, using empty games dict")
 
-def save_games():
+def save_game(cid):
     """
-    Saves current game state to file.
-    Converts all data structures into JSON-serializable types (lists, strings).
+    Saves (or deletes) the sidecar file for a single chat's game.
+    A finished/reset game has no entry in GAMES anymore, so its file is
+    removed. Writes go through a temp file + os.replace so a crash can't
+    leave a half-written game behind.
     """
-    if not GAMES:
-        logger.debug("[UNO] No games to save")
-        return
-        
-    ser = {}
-    for cid, g in GAMES.items():
-        ser[str(cid)] = {
-            "players": g["players"],
-            "hands": {
-                str(uid): [list(card) for card in cards]  # Convert cards to list of lists
-                for uid, cards in g["hands"].items()
-            },
-            "deck": [list(card) for card in g["deck"]],
-            "pile": [list(card) for card in g["pile"]],
-            "current": g["current"],
-            "direction": g["direction"],
-            "current_color": g["current_color"],
-            "started": g["started"],
-            "last_active": g["last_active"].isoformat(),  # Convert datetime to ISO string
-        }
+    path = _game_path(cid)
+    game = GAMES.get(cid)
     try:
-        GAMES_FILE.write_text(json.dumps(ser, ensure_ascii=False, indent=2), encoding="utf-8")
-        logger.info(f"[UNO] Saved {len(GAMES)} games to file")
+        if game is None:
+            path.unlink(missing_ok=True)
+            return
+        GAMES_DIR.mkdir(exist_ok=True)
+        _atomic_write(path, _encode(_serialize_game(game)))
     except Exception as e:
-        logger.exception(f"Failed to save UNO games state: {e}")
+        logger.exception(f"Failed to save UNO game for chat {cid}: {e}")
+
+def save_games():
+    """
+    Saves every in-memory game to its own sidecar file.
+    Only needed for whole-state operations (startup cleanup); the normal
+    path saves just the one chat that changed.
+    """
+    for cid in list(GAMES):
+        save_game(cid)
+    logger.info("[UNO] Saved %d games to file", len(GAMES))
+
+# Chats whose game state changed since the last flush. Handlers mark the
+# chat dirty instead of re-serializing and rewriting every game
+# synchronously on the event loop; a repeating job flushes at most once
+# per second, off-thread, so card plays respond without waiting on disk.
+_dirty: set = set()
+
+def mark_dirty(cid: int):
+    _dirty.add(cid)
+
+def _flush_dirty():
+    # Synchronous flush for shutdown: the loop is gone by then, so writing
+    # straight from the live dicts is safe.
+    while _dirty:
+        save_game(_dirty.pop())  # Only the chats that actually changed
+    _flush_stats()
+
+def _write_flush(payloads, stats_payload):
+    """
+    Runs in a worker thread: nothing but disk I/O on pre-encoded bytes, so
+    it never touches the live GAMES dicts while handlers mutate them.
+    Returns which writes failed so the job can re-mark them for retry.
+    """
+    failed_cids = []
+    for cid, payload in payloads:
+        path = _game_path(cid)
+        try:
+            if payload is None:
+                path.unlink(missing_ok=True)  # Game ended — drop its sidecar
+            else:
+                GAMES_DIR.mkdir(exist_ok=True)
+                _atomic_write(path, payload)
+        except Exception as e:
+            logger.exception(f"Failed to save UNO game for chat {cid}: {e}")
+            failed_cids.append(cid)
+    stats_failed = False
+    if stats_payload is not None:
+        try:
+            _atomic_write(STATS_FILE, stats_payload)
+        except Exception as e:
+            logger.exception(f"Failed to save UNO stats: {e}")
+            stats_failed = True
+    return failed_cids, stats_failed
+
+async def _flush_job(context):
+    global _stats_dirty
+    if not _dirty and not _stats_dirty:
+        return
+    # Serialize on the event loop — no handler can run mid-encode here, so
+    # every snapshot is a consistent whole-game state. Only the writes (the
+    # part that actually blocks) go to the worker thread.
+    payloads = []
+    for cid in list(_dirty):
+        game = GAMES.get(cid)
+        payloads.append((cid, None if game is None else _encode(_serialize_game(game))))
+    _dirty.difference_update(cid for cid, _ in payloads)
+    stats_payload = None
+    if _stats_dirty:
+        _stats_dirty = False
+        stats_payload = _dumps(_STATS_CACHE)
+    failed_cids, stats_failed = await asyncio.to_thread(_write_flush, payloads, stats_payload)
+    # Anything that didn't make it to disk stays dirty for the next pass
+    _dirty.update(failed_cids)
+    if stats_failed:
+        _stats_dirty = True
 
 def cleanup_old_games():
     """
@@ -116,13 +312,11 @@ def cleanup_old_games():
         time_diff = current_time - game["last_active"]
         if time_diff > timedelta(hours=24):
             to_remove.append(cid)
-            logger.info(f"[UNO] Removing inactive game in chat {cid}")
+            logger.info("[UNO] Removing inactive game in chat %s", cid)
     
     for cid in to_remove:
         del GAMES[cid]
-    
-    if to_remove:
-        save_games()
+        save_game(cid)  # Removes the chat's sidecar file
 
 def initialize_games():
     """
@@ -154,13 +348,53 @@ def log_handler(func):
     async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE):
         user_id = update.effective_user.id if update.effective_user else None
         chat_id = update.effective_chat.id if update.effective_chat else None
-        logger.info(f"[UNO] Handler {func.__name__} triggered by user={user_id} chat={chat_id}")
+        logger.info("[UNO] Handler %s triggered by user=%s chat=%s", func.__name__, user_id, chat_id)
         try:
             return await func(update, context)
         except Exception:
             logger.exception(f"[UNO] Exception in handler {func.__name__}")
     return wrapper
 
+# Cache for get_chat_member results: every lookup is a network round trip
+# to Telegram, and the same few players get resolved over and over during
+# a game (next turn, draw recipient, leaderboard). Entries expire after
+# 5 minutes so renames still show up reasonably fast.
+_MEMBER_TTL = 300.0
+_MEMBER_CACHE: dict = {}   # (chat_id, user_id) -> (expires_at, member)
+
+async def get_member_cached(bot, cid, uid):
+    key = (cid, uid)
+    now = time.monotonic()
+    hit = _MEMBER_CACHE.get(key)
+    if hit is not None and hit[0] > now:
+        return hit[1]
+    member = await bot.get_chat_member(cid, uid)
+    _MEMBER_CACHE[key] = (now + _MEMBER_TTL, member)
+    # Opportunistic cleanup so the cache can't grow without bound
+    if len(_MEMBER_CACHE) > 4096:
+        for k in [k for k, v in _MEMBER_CACHE.items() if v[0] <= now]:
+            del _MEMBER_CACHE[k]
+    return member
+
+# Handlers delete the command message to reduce clutter, but in groups
+# where the bot isn't admin that call always fails with Forbidden — one
+# wasted round trip per command. Remember which chats refuse deletion and
+# skip the call there; re-probe after 10 minutes in case rights changed.
+_DELETE_TTL = 600.0
+_NO_DELETE: dict = {}   # chat_id -> monotonic time when we may probe again
+
+async def maybe_delete(bot, cid, mid):
+    until = _NO_DELETE.get(cid)
+    if until is not None and until > time.monotonic():
+        return
+    try:
+        await bot.delete_message(cid, mid)
+        _NO_DELETE.pop(cid, None)
+    except Forbidden:
+        _NO_DELETE[cid] = time.monotonic() + _DELETE_TTL
+    except Exception:
+        pass  # Message already gone, flood limits, etc. — best effort only
+
 # List of card colors (in Russian — now translated)
 COLORS = ["red", "green", "blue", "yellow"]
 
@@ -173,9 +407,33 @@ SPECIAL = {
     "wild4": "wild4",
 }
 
-def create_deck() -> List[Tuple[str, str]]:
-    """
-    Creates a full UNO deck: color-number and special cards.
+# There are only 54 distinct card identities, so in memory a card is just
+# its index (0..53) into the CARDS table. Decks and piles become
+# bytearrays — the whole deck is 108 bytes instead of 108 tuple pointers —
+# and every card comparison is integer equality. CARDS maps index back to
+# the (color, value) pair, CARD_IDX goes the other way.
+CARDS: Tuple[Tuple[str, str], ...] = tuple(
+    [(c, v) for c in COLORS for v in [str(n) for n in range(10)] + ["skip", "reverse", "draw2"]]
+    + [("wild", "wild"), ("wild", "wild4")]
+)
+CARD_IDX: dict = {card: i for i, card in enumerate(CARDS)}
+
+# Ready-made display string for every card, computed once at import.
+# Handlers render cards on nearly every message; this replaces a branch,
+# a SPECIAL lookup, and an f-string per card with a single index.
+CARD_DISPLAY: Tuple[str, ...] = tuple(
+    f"wild {SPECIAL[v]}" if c == "wild" else f"{c} {v if v.isdigit() else SPECIAL[v]}"
+    for c, v in CARDS
+)
+
+# Cards on disk are stored as indices; files written before the switch
+# hold [color, value] pairs, which this maps onto the table on load
+def _card_in(c) -> int:
+    return c if isinstance(c, int) else CARD_IDX[tuple(c)]
+
+def _build_deck_template() -> bytes:
+    """
+    Builds the standard 108-card UNO deck once, at import.
     Each color gets:
       - One "0"
       - Two of each 1–9
@@ -183,21 +441,32 @@ def create_deck() -> List[Tuple[str, str]]:
     Also adds:
       - 4 wild cards
       - 4 wild draw four cards
-    Then shuffles the full deck.
     """
-    deck: List[Tuple[str, str]] = []
+    deck: List[int] = []
 
     for c in COLORS:
-        deck.append((c, "0"))  # One zero card per color
+        deck.append(CARD_IDX[(c, "0")])  # One zero card per color
         for n in range(1, 10):  # Two of each number 1-9
-            deck.extend([(c, str(n)), (c, str(n))])
+            card = CARD_IDX[(c, str(n))]
+            deck.extend([card, card])
         for sp in ("skip", "reverse", "draw2"):  # Two of each special
-            deck.extend([(c, sp), (c, sp)])
+            card = CARD_IDX[(c, sp)]
+            deck.extend([card, card])
 
     # Add wild and wild draw four cards
-    deck.extend([("wild", "wild")] * 4)
-    deck.extend([("wild", "wild4")] * 4)
+    deck.extend([CARD_IDX[("wild", "wild")]] * 4)
+    deck.extend([CARD_IDX[("wild", "wild4")]] * 4)
+    return bytes(deck)
+
+# The deck composition never changes, so it's frozen here and each new
+# game just copies and shuffles it instead of re-running the build loops
+_DECK_TEMPLATE = _build_deck_template()
 
+def create_deck() -> bytearray:
+    """
+    Returns a freshly shuffled copy of the standard 108-card deck.
+    """
+    deck = bytearray(_DECK_TEMPLATE)
     random.shuffle(deck)
     return deck
 
@@ -217,26 +486,24 @@ async def uno_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     cid = update.effective_chat.id
     GAMES[cid] = {
         "players": [],             # List of user IDs
-        "hands": {},               # Maps user ID to list of cards
+        "players_index": {},       # Maps user ID to their seat in `players`
+        "hands": {},               # Maps user ID to a multiset of card indices
         "deck": create_deck(),     # The shuffled deck of cards
-        "pile": [],                # Cards that have been played
+        "pile": bytearray(),       # Cards that have been played
         "current": 0,              # Index of current player in `players`
         "direction": 1,            # Direction of play: 1 or -1
         "current_color": None,     # Active color for matching
         "started": False,          # Whether the game has begun
         "last_active": datetime.now(timezone.utc),  # Timestamp for cleanup
     }
-    save_games()
+    mark_dirty(cid)
     await update.message.reply_text(
         "🃏 New UNO game started!\n"
         "Send /uno_join to join the game."
     )
 
     # Try to delete the command message to reduce clutter
-    try:
-        await context.bot.delete_message(cid, update.message.message_id)
-    except:
-        pass
+    await maybe_delete(context.bot, cid, update.message.message_id)
 
 @log_handler
 async def uno_join(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -250,19 +517,17 @@ async def uno_join(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if game["started"]:
         return await update.message.reply_text("❗ Game already started!")
     uid = update.effective_user.id
-    if uid in game["players"]:
+    if uid in game["players_index"]:  # Dict lookup instead of a list scan
         return await update.message.reply_text("You are already in the game.")
+    game["players_index"][uid] = len(game["players"])
     game["players"].append(uid)
     game["last_active"] = datetime.now(timezone.utc)
-    save_games()
+    mark_dirty(cid)
     await update.message.reply_text(
         f"✅ @{update.effective_user.username} joined! Total: {len(game['players'])}"
     )
 
-    try:
-        await context.bot.delete_message(cid, update.message.message_id)
-    except:
-        pass
+    await maybe_delete(context.bot, cid, update.message.message_id)
 
 @log_handler
 async def uno_begin(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -279,31 +544,30 @@ async def uno_begin(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if len(game["players"]) < 2:
         return await update.message.reply_text("❗ Need at least 2 players.")
 
-    # Deal 7 cards to each player
+    # Deal 7 cards to each player (hands are Counters: O(1) membership,
+    # add, and removal, unlike the old list scans)
     for uid in game["players"]:
-        game["hands"][uid] = [game["deck"].pop() for _ in range(7)]
+        game["hands"][uid] = Counter(game["deck"].pop() for _ in range(7))
 
     # Place the first card from the deck onto the pile
     top = game["deck"].pop()
     game["pile"].append(top)
-    game["current_color"] = random.choice(COLORS) if top[0] == "wild" else top[0]
+    top_color = CARDS[top][0]
+    game["current_color"] = random.choice(COLORS) if top_color == "wild" else top_color
     game["started"] = True
     game["last_active"] = datetime.now(timezone.utc)
-    save_games()
+    mark_dirty(cid)
 
     first = game["players"][game["current"]]
-    member = await context.bot.get_chat_member(cid, first)
+    member = await get_member_cached(context.bot, cid, first)
     await update.message.reply_text(
         f"🃏 Game started!\n"
-        f"Top card: {top[0]} {top[1] if top[1].isdigit() else SPECIAL[top[1]]}\n"
+        f"Top card: {CARD_DISPLAY[top]}\n"
         f"Current color: {game['current_color']}\n"
         f"First player: @{member.user.username}"
     )
 
-    try:
-        await context.bot.delete_message(cid, update.message.message_id)
-    except:
-        pass
+    await maybe_delete(context.bot, cid, update.message.message_id)
 
 @log_handler
 async def uno_reset(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -314,16 +578,13 @@ async def uno_reset(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     if cid in GAMES:
         del GAMES[cid]
-        save_games()
+        mark_dirty(cid)
         await update.message.reply_text("🔄 UNO game reset. Start a new one with /uno_start.")
-        logger.info(f"[UNO] Game reset in chat {cid}")
+        logger.info("[UNO] Game reset in chat %s", cid)
     else:
         await update.message.reply_text("❗ No active game to reset.")
 
-    try:
-        await context.bot.delete_message(cid, update.message.message_id)
-    except:
-        pass
+    await maybe_delete(context.bot, cid, update.message.message_id)
 
 @log_handler
 async def uno_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -347,23 +608,18 @@ async def uno_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if game.get('started', False):
         current_player = game["players"][game["current"]]
         try:
-            current_username = (await context.bot.get_chat_member(cid, current_player)).user.username
+            current_username = (await get_member_cached(context.bot, cid, current_player)).user.username
         except:
             current_username = str(current_player)
         status_text += f"🔄 Current turn: @{current_username}\n"
         status_text += f"🎨 Current color: {game.get('current_color', 'not set')}\n"
 
         if game.get('pile'):
-            top_card = game['pile'][-1]
-            display = f"{top_card[0]} {top_card[1] if top_card[1].isdigit() else SPECIAL.get(top_card[1], top_card[1])}"
-            status_text += f"🃏 Top card: {display}\n"
+            status_text += f"🃏 Top card: {CARD_DISPLAY[game['pile'][-1]]}\n"
 
     await update.message.reply_text(status_text)
 
-    try:
-        await context.bot.delete_message(cid, update.message.message_id)
-    except:
-        pass
+    await maybe_delete(context.bot, cid, update.message.message_id)
 
 @log_handler
 async def uno_hand(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -376,22 +632,17 @@ async def uno_hand(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not game or not game["started"]:
         return await update.message.reply_text("❗ The game is not running.")
     uid = update.effective_user.id
-    hand = game["hands"].get(uid, [])
+    hand = game["hands"].get(uid)
     if not hand:
         return await update.message.reply_text("❗ You have no cards.")
     game["last_active"] = datetime.now(timezone.utc)
-    save_games()
+    mark_dirty(cid)
 
     # Format cards into a readable string
-    txt = "Your cards:\n" + " | ".join(
-        f"{c} {v if v.isdigit() else SPECIAL[v]}" for c, v in hand
-    )
+    txt = "Your cards:\n" + " | ".join(CARD_DISPLAY[c] for c in hand.elements())
     await context.bot.send_message(chat_id=uid, text=txt)
 
-    try:
-        await context.bot.delete_message(cid, update.message.message_id)
-    except:
-        pass
+    await maybe_delete(context.bot, cid, update.message.message_id)
 
 @log_handler
 async def uno_play(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -418,88 +669,90 @@ async def uno_play(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "or /uno_play wild4 <color>"
         )
 
-    # Determine card
+    # Determine card — unknown input maps to no index and fails the hand
+    # check below with the same message as a card the player doesn't hold
     if args[0] in ("wild", "wild4"):
         if len(args) < 2 or args[1] not in COLORS:
             return await update.message.reply_text("🎨 Choose a color: red/green/blue/yellow")
-        card = ("wild", args[0])
+        card = CARD_IDX.get(("wild", args[0]))
         chosen_color = args[1]
     else:
-        color, value = args[0], args[1]
-        card = (color, value)
+        card = CARD_IDX.get((args[0], args[1]))
 
-    hand = game["hands"].get(uid, [])
-    if card not in hand:
+    hand = game["hands"].get(uid, Counter())
+    if card is None or not hand[card]:  # Counter returns 0 for absent cards, O(1)
         return await update.message.reply_text("❗ You don't have that card.")
 
-    # Check play validity
+    # Check play validity (color/value compared via the CARDS table)
+    color, value = CARDS[card]
     top_color = game["current_color"]
-    top_value = game["pile"][-1][1]
-    if card[0] != "wild" and card[0] != top_color and card[1] != top_value:
+    top_value = CARDS[game["pile"][-1]][1]
+    if color != "wild" and color != top_color and value != top_value:
         return await update.message.reply_text("❗ Invalid card: does not match color or value.")
 
-    # Play the card
-    hand.remove(card)
+    # Play the card (drop the key at zero so the victory check stays truthy)
+    hand[card] -= 1
+    if not hand[card]:
+        del hand[card]
     game["pile"].append(card)
-    game["current_color"] = chosen_color if card[0] == "wild" else card[0]
+    game["current_color"] = chosen_color if color == "wild" else color
     game["last_active"] = datetime.now(timezone.utc)
 
     uname = f"@{update.effective_user.username}"
-    disp = f"{card[0]} {card[1] if card[1].isdigit() else SPECIAL[card[1]]}"
-    await update.message.reply_text(f"{uname} played {disp}\n▶️ Current color: {game['current_color']}")
-
-    # Handle special card effects
-    if card[1] == "skip":
-        advance_turn(game)
-        advance_turn(game)
-    elif card[1] == "reverse":
-        game["direction"] *= -1
-        if len(game["players"]) == 2:
-            advance_turn(game)
-        advance_turn(game)
-    elif card[1] == "draw2":
-        advance_turn(game)
-        nxt = game["players"][game["current"]]
+    disp = CARD_DISPLAY[card]
+    # Everything about this play goes into one message — each reply_text
+    # used to be its own HTTPS round-trip, up to three per turn
+    lines = [f"{uname} played {disp}", f"▶️ Current color: {game['current_color']}"]
+
+    # Handle special card effects. The advance_turn arithmetic is inlined
+    # on locals here — this is the hottest handler, and each call was a
+    # function call plus fresh dict lookups of players/current/direction.
+    players = game["players"]
+    n = len(players)
+    d = game["direction"]
+    cur = game["current"]
+    if value == "skip":
+        cur = (cur + 2 * d) % n
+    elif value == "reverse":
+        d = -d
+        game["direction"] = d
+        # With two players a reverse acts like a skip
+        cur = (cur + 2 * d) % n if n == 2 else (cur + d) % n
+    elif value == "draw2":
+        cur = (cur + d) % n
+        nxt = players[cur]
         draw = [game["deck"].pop() for _ in range(2)]
-        game["hands"][nxt].extend(draw)
-        member = await context.bot.get_chat_member(cid, nxt)
-        await update.message.reply_text(
-            f"➕2: @{member.user.username} draws 2 cards and skips turn"
-        )
-        advance_turn(game)
-    elif card[1] == "wild4":
-        advance_turn(game)
-        nxt = game["players"][game["current"]]
+        game["hands"][nxt].update(draw)
+        member = await get_member_cached(context.bot, cid, nxt)
+        lines.append(f"➕2: @{member.user.username} draws 2 cards and skips turn")
+        cur = (cur + d) % n
+    elif value == "wild4":
+        cur = (cur + d) % n
+        nxt = players[cur]
         draw = [game["deck"].pop() for _ in range(4)]
-        game["hands"][nxt].extend(draw)
-        member = await context.bot.get_chat_member(cid, nxt)
-        await update.message.reply_text(
-            f"🎴 Wild Draw Four: @{member.user.username} draws 4 cards and skips turn"
-        )
-        advance_turn(game)
+        game["hands"][nxt].update(draw)
+        member = await get_member_cached(context.bot, cid, nxt)
+        lines.append(f"🎴 Wild Draw Four: @{member.user.username} draws 4 cards and skips turn")
+        cur = (cur + d) % n
     else:
-        advance_turn(game)
+        cur = (cur + d) % n
+    game["current"] = cur
 
     # Check for victory
     if not hand:
-        await update.message.reply_text(f"🏆 {uname} has won the UNO game!")
-        stats = load_stats()
-        chat_stats = stats.setdefault(str(cid), {})
-        chat_stats[str(uid)] = chat_stats.get(str(uid), 0) + 1
-        save_stats(stats)
+        lines.append(f"🏆 {uname} has won the UNO game!")
+        await update.message.reply_text("\n".join(lines))
+        bump_win(cid, uid)
         del GAMES[cid]
-        save_games()
+        mark_dirty(cid)
         return
 
-    save_games()
-    nxt = game["players"][game["current"]]
-    member = await context.bot.get_chat_member(cid, nxt)
-    await update.message.reply_text(f"➡️ Next turn: @{member.user.username}")
+    mark_dirty(cid)
+    member = await get_member_cached(context.bot, cid, players[cur])
+    lines.append(f"➡️ Next turn: @{member.user.username}")
+    await update.message.reply_text("\n".join(lines))
 
-    try:
-        await context.bot.delete_message(cid, update.message.message_id)
-    except:
-        pass
+    await maybe_delete(context.bot, cid, update.message.message_id)
 
 @log_handler
 async def uno_draw(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -521,27 +774,24 @@ async def uno_draw(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not game["deck"]:
         last = game["pile"].pop()
         game["deck"] = game["pile"]
-        game["pile"] = [last]
+        game["pile"] = bytearray((last,))
         random.shuffle(game["deck"])
 
     # Draw card
     card = game["deck"].pop()
-    game["hands"][uid].append(card)
+    game["hands"][uid][card] += 1
     game["last_active"] = datetime.now(timezone.utc)
-    save_games()
+    mark_dirty(cid)
 
     await update.message.reply_text(
-        f"🃏 You drew: {card[0]} {card[1] if card[1].isdigit() else SPECIAL[card[1]]}\n⏭️ Your turn is skipped."
+        f"🃏 You drew: {CARD_DISPLAY[card]}\n⏭️ Your turn is skipped."
     )
     advance_turn(game)
     nxt = game["players"][game["current"]]
-    member = await context.bot.get_chat_member(cid, nxt)
+    member = await get_member_cached(context.bot, cid, nxt)
     await update.message.reply_text(f"➡️ Next turn: @{member.user.username}")
 
-    try:
-        await context.bot.delete_message(cid, update.message.message_id)
-    except:
-        pass
+    await maybe_delete(context.bot, cid, update.message.message_id)
 
 @log_handler
 async def uno_top10(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -555,13 +805,16 @@ async def uno_top10(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     # Sort by win count
     top = sorted(stats.items(), key=lambda x: x[1], reverse=True)[:10]
+
+    # Fire all member lookups at once — the handler is network-bound, so
+    # wall time drops from the sum of the round trips to the slowest one
+    members = await asyncio.gather(
+        *(get_member_cached(context.bot, int(cid), int(uid)) for uid, _ in top),
+        return_exceptions=True,
+    )
     text = "🏆 Top 10 UNO Winners:\n"
-    for i, (uid, wins) in enumerate(top, start=1):
-        try:
-            member = await context.bot.get_chat_member(int(cid), int(uid))
-            name = "@" + member.user.username
-        except:
-            name = uid
+    for i, ((uid, wins), member) in enumerate(zip(top, members), start=1):
+        name = uid if isinstance(member, Exception) else "@" + member.user.username
         text += f"{i}. {name} — {wins} wins\n"
     await update.message.reply_text(text)
 
@@ -610,3 +863,9 @@ def register_handlers(app):
     app.add_handler(CommandHandler('uno_status', uno_status))     # Get current game status
     app.add_handler(CommandHandler('uno_reset', uno_reset))       # Reset the current game
     app.add_handler(CommandHandler('uno', uno))                   # Help command that lists all others
+
+    # Flush dirty game state at most once per second, off the event loop
+    app.job_queue.run_repeating(_flush_job, interval=1.0, first=1.0)
+
+# Last-chance drain so a shutdown between flushes doesn't lose moves
+atexit.register(_flush_dirty)
@@ -21,6 +21,14 @@ from zoneinfo import ZoneInfo
 
 from voxcoinbot import logger, load_data, get_chat  # Use shared utilities from main bot
 
+# Compiled once at import — the handler used to rebuild this pattern (via
+# the regex cache lookup) on every leave event
+_MD_ESC_RE = re.compile(r"([_*\[\]()~`>#+-=|{}.!])")
+
+# Escape markdown characters (so usernames don’t break formatting)
+def esc(s):
+    return _MD_ESC_RE.sub(r"\\\1", s)
+
 # This function is triggered when a user leaves the chat
 async def on_member_leave(update: Update, context: ContextTypes.DEFAULT_TYPE):
     cm = update.chat_member  # The chat member update event
@@ -41,9 +49,6 @@ async def on_member_leave(update: Update, context: ContextTypes.DEFAULT_TYPE):
         elif old.status == "administrator":
             title = "Administrator"
 
-        # Escape markdown characters (so usernames don’t break formatting)
-        def esc(s): return re.sub(r"([_*\[\]()~`>#+-=|{}.!])", r"\\\1", s)
-
         # Add the title to the message if there is one
         sig_part = f" «{esc(title)}»" if title else ""
         logger.info(f"TITLE: {sig_part}")
@@ -69,4 +74,6 @@ async def on_member_leave(update: Update, context: ContextTypes.DEFAULT_TYPE):
 def register_admin(app):
     logger.info("Registering admin handlers...")
     app.add_handler(ChatMemberHandler(on_member_leave, ChatMemberHandler.CHAT_MEMBER))
-    app.run_polling(allowed_updates=Update.ALL_TYPES)  # Not recommended if called from main.py too
+    # Polling is started exactly once by the main bot — starting a second
+    # poller here would either block this call forever or race the main
+    # one and double-dispatch every update
@@ -1,9 +1,12 @@
 # Import standard Python libraries
+import atexit                  # Final flush of cached stats on exit
+import asyncio                 # Off-loop disk writes for the stats flush
+import mmap                    # One-pass scans of the topics/songs files
+import tempfile                # Unique temp names for atomic writes
 import os                      # For file path manipulations
 import re                      # For regular expressions
 import random                  # For random selections
 import logging                 # For logging debug and info messages
-import json                    # For reading and writing JSON files
 from zoneinfo import ZoneInfo # For timezone support (Europe/Paris)
 from datetime import datetime, time as dtime  # For time-related operations
 from pathlib import Path       # For filesystem paths
@@ -18,6 +21,9 @@ logger = logging.getLogger(__name__)
 # Import helper functions from the voxcoinbot module
 from voxcoinbot import load_data, save_data, get_chat, update_chat_user, setup_logging
 
+# Serialize through the shared orjson-or-stdlib shim (see modules/_json)
+from modules._json import dumps as _dumps, loads as _loads
+
 # File paths for different bot data
 BASE_DIR = Path(__file__).resolve().parent
 TOPICS_FILE = BASE_DIR / 'topics.txt'     # File storing conversation topics
@@ -30,30 +36,98 @@ REWARDS = [15, 10, 5]  # Rewards for weekly top 3 active users
 
 # Create empty actions file if it doesn't exist
 if not ACTIONS_FILE.exists():
-    with ACTIONS_FILE.open("w", encoding="utf-8") as f:
-        json.dump([], f, ensure_ascii=False, indent=2)
+    ACTIONS_FILE.write_bytes(_dumps([]))
 
-# Load actions from file
-def load_actions():
-    with ACTIONS_FILE.open(encoding="utf-8") as f:
-        return json.load(f)
+# Actions are parsed once and cached; user_action runs on every text
+# message, and re-parsing a file of up to 10,000 entries each time was
+# wasted CPU. The (mtime, size) stamp detects edits made outside the bot
+# so a changed file is still picked up.
+_actions_cache = None
+_actions_stamp = None
+_actions_by_word: dict = {}  # Lowercased trigger word -> action record
 
-# Save actions to file
+# Load actions from file (cached while the file is unchanged)
+def load_actions():
+    global _actions_cache, _actions_stamp, _actions_by_word
+    st = os.stat(ACTIONS_FILE)
+    stamp = (st.st_mtime_ns, st.st_size)
+    if stamp != _actions_stamp:
+        _actions_cache = _loads(ACTIONS_FILE.read_bytes())
+        _actions_stamp = stamp
+        _actions_by_word = {a["word"].lower(): a for a in _actions_cache}
+    return _actions_cache
+
+# Save actions to file (atomically, via temp file + rename) and keep the
+# cache current
 def save_actions(actions):
-    with ACTIONS_FILE.open("w", encoding="utf-8") as f:
-        json.dump(actions, f, ensure_ascii=False, indent=2)
-
-# Load weekly stats from file
+    global _actions_cache, _actions_stamp, _actions_by_word
+    tmp = ACTIONS_FILE.with_suffix('.json.tmp')
+    tmp.write_bytes(_dumps(actions))
+    os.replace(tmp, ACTIONS_FILE)
+    st = os.stat(ACTIONS_FILE)
+    _actions_cache = actions
+    _actions_stamp = (st.st_mtime_ns, st.st_size)
+    _actions_by_word = {a["word"].lower(): a for a in actions}
+
+# Weekly stats stay resident in memory: the counter handler fires on every
+# text message, and a full JSON read + rewrite per message was pure disk
+# overhead. Callers mutate the cached dict, _save_weekly just marks it
+# dirty, and a repeating job writes the file out when something changed.
+_weekly_cache = None
+_weekly_dirty = False
+
+# Return the in-memory weekly stats, reading the file once lazily
 def _load_weekly():
-    if not os.path.isfile(WEEKLY_FILE):
-        return {}
-    with open(WEEKLY_FILE, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    global _weekly_cache
+    if _weekly_cache is None:
+        if os.path.isfile(WEEKLY_FILE):
+            with open(WEEKLY_FILE, 'rb') as f:
+                _weekly_cache = _loads(f.read())
+        else:
+            _weekly_cache = {}
+    return _weekly_cache
+
+# Mark the weekly stats as needing a flush (already mutated in place)
+def _save_weekly(data=None):
+    global _weekly_dirty
+    _weekly_dirty = True
+
+def _write_weekly(snapshot):
+    # Temp file + rename: a crash mid-write leaves the old counts intact.
+    # The temp name is unique per call so overlapping writers (two flush
+    # job instances, or the job racing the atexit flush) can't truncate
+    # each other's half-written temp before the rename.
+    fd, tmp = tempfile.mkstemp(dir=BASE_DIR, prefix='weekly_counts.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_dumps(snapshot))
+        os.replace(tmp, WEEKLY_FILE)
+    except Exception:
+        try:
+            os.unlink(tmp)  # Don't leave orphaned temp files behind
+        except OSError:
+            pass
+        raise
+
+def _flush_weekly_now():
+    global _weekly_dirty
+    if _weekly_dirty:
+        _weekly_dirty = False
+        _write_weekly(_weekly_cache)
+
+# Periodic flush job; also registered with atexit so counts collected
+# right before a shutdown still make it to disk. The job serializes a
+# per-chat copy taken on the event loop and hands the actual disk write
+# to a worker thread, so handlers never wait behind file I/O.
+async def _flush_weekly_job(context: ContextTypes.DEFAULT_TYPE):
+    global _weekly_dirty
+    if not _weekly_dirty:
+        return
+    _weekly_dirty = False
+    snapshot = {cid: dict(stats) for cid, stats in _weekly_cache.items()}
+    await asyncio.to_thread(_write_weekly, snapshot)
 
-# Save weekly stats to file
-def _save_weekly(data):
-    with open(WEEKLY_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False)
+atexit.register(_flush_weekly_now)
 
 # Return top 3 users based on weekly stats
 def _get_weekly_top(chat_id):
@@ -121,8 +195,8 @@ async def voxactivetop(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text('[TRANSLATE] No messages this week.')
         return
     text = '📈 Current weekly message Top-3:\n'
+    data = load_data()  # One load for all three rows, not one per row
     for idx, (uid, cnt) in enumerate(top):
-        data = load_data()
         user_rec = data['chats'].get(chat_id, {}).get('users', {}).get(uid, {})
         uname = '@' + user_rec.get('username', uid)
         text += f"{idx+1}. {uname} — {cnt} messages\n"
@@ -139,15 +213,49 @@ EASTER_EGGS = {
              'I’m listening', 'my creator is probably online if I answered ;)']
 }
 
+# One compiled alternation over all trigger keys (longest first so an egg
+# can't shadow a longer one it prefixes). Matching a message is a single
+# C-level scan instead of a startswith probe per egg, so adding more eggs
+# costs nothing at message time.
+_EGG_RESPONSES = {k.lower(): v for k, v in EASTER_EGGS.items()}
+_EGG_RE = re.compile(
+    "^(" + "|".join(re.escape(k) for k in sorted(_EGG_RESPONSES, key=len, reverse=True)) + ")",
+    re.IGNORECASE,
+)
+
+# Parsed, comment-stripped lines of topics.txt and songs.txt, keyed by
+# path and invalidated by mtime — the commands used to re-read and
+# re-filter the whole file on every call.
+_lines_cache: dict = {}   # path -> (mtime_ns, [lines])
+
+# Extracts stripped, non-empty, non-comment lines in one compiled-regex
+# pass over the mmap'd file — the comprehension it replaces called
+# .strip() three times per line
+_LINE_RE = re.compile(rb'(?m)^(?!\s*#)\s*(\S.*?)\s*$')
+
+def _get_lines(path):
+    path = str(path)
+    if not os.path.isfile(path):
+        with open(path, 'w', encoding='utf-8'):
+            pass  # Create an empty file if missing
+    mtime = os.stat(path).st_mtime_ns
+    hit = _lines_cache.get(path)
+    if hit is not None and hit[0] == mtime:
+        return hit[1]
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            lines = []
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                lines = [m.group(1).decode('utf-8') for m in _LINE_RE.finditer(mm)]
+    _lines_cache[path] = (mtime, lines)
+    return lines
+
 # Randomly pick a song from songs.txt
 async def random_song(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """/song — pick a random song from songs.txt"""
     logger.info("random_song called")
-    if not os.path.isfile(SONGS_FILE):
-        with open(SONGS_FILE, 'w', encoding='utf-8'):
-            pass  # Create an empty file if missing
-    with open(SONGS_FILE, 'r', encoding='utf-8') as f:
-        lines = [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
+    lines = _get_lines(SONGS_FILE)
     if not lines:
         await update.message.reply_text("No songs yet. Use /addsong to add the first one!")
         return
@@ -173,22 +281,44 @@ async def add_song(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def random_topic(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """/topic — pick a random conversation topic from topics.txt"""
     logger.info("random_topic called")
-    if not os.path.isfile(TOPICS_FILE):
-        with open(TOPICS_FILE, 'w', encoding='utf-8'):
-            pass
-    with open(TOPICS_FILE, 'r', encoding='utf-8') as f:
-        lines = [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
+    lines = _get_lines(TOPICS_FILE)
     if not lines:
         await update.message.reply_text("No topics yet. Use /addnewtopic to create one!")
         return
     topic = random.choice(lines)
     await update.message.reply_text(f'🎲 Conversation topic:\n\n{topic}')
 
+# Topics are numbered in increasing order, so the highest number sits in
+# the last numbered line. The first add reads just a tail block of the
+# file to find it; after that the counter lives in memory and each add
+# is a plain increment instead of a full-file scan.
+_TOPIC_NUM_RE = re.compile(r'^(\d+)\.')
+_topics_max_num = None
+
+def _find_max_topic_num():
+    with open(TOPICS_FILE, 'rb') as f:
+        f.seek(0, 2)
+        size = f.tell()
+        f.seek(max(0, size - 4096))
+        tail = f.read().decode('utf-8', errors='ignore')
+    for line in reversed(tail.splitlines()):
+        m = _TOPIC_NUM_RE.match(line.strip())
+        if m:
+            return int(m.group(1))
+    # No numbered line in the tail — fall back to scanning everything
+    max_num = 0
+    for line in _get_lines(TOPICS_FILE):
+        m = _TOPIC_NUM_RE.match(line)
+        if m and int(m.group(1)) > max_num:
+            max_num = int(m.group(1))
+    return max_num
+
 # Add a new conversation topic with automatic numbering
 async def addnewtopic(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     /addnewtopic <text> — adds a new conversation topic to topics.txt with auto-incremented number
     """
+    global _topics_max_num
     text = ' '.join(context.args).strip()
     logger.info("addnewtopic called with text=%r", text)
     if not text:
@@ -199,22 +329,20 @@ async def addnewtopic(update: Update, context: ContextTypes.DEFAULT_TYPE):
         with open(TOPICS_FILE, 'w', encoding='utf-8'):
             pass
 
-    max_num = 0
-    with open(TOPICS_FILE, 'r', encoding='utf-8') as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith('#'):
-                continue
-            m = re.match(r'^(\d+)\.', line)
-            if m:
-                num = int(m.group(1))
-                if num > max_num:
-                    max_num = num
-
-    new_num = max_num + 1
+    if _topics_max_num is None:
+        _topics_max_num = _find_max_topic_num()
+
+    new_num = _topics_max_num + 1
     entry = f"{new_num}. {text}\n"
     with open(TOPICS_FILE, 'a', encoding='utf-8') as f:
         f.write(entry)
+    _topics_max_num = new_num
+
+    # Keep the line cache current without forcing a re-read
+    hit = _lines_cache.get(str(TOPICS_FILE))
+    if hit is not None:
+        hit[1].append(entry.strip())
+        _lines_cache[str(TOPICS_FILE)] = (os.stat(TOPICS_FILE).st_mtime_ns, hit[1])
 
     await update.message.reply_text(f"Topic #{new_num} added:\n{entry}")
 
@@ -224,12 +352,12 @@ async def easter_eggs_handler(update: Update, context: ContextTypes.DEFAULT_TYPE
     Responds to messages starting with keys from EASTER_EGGS.
     Can return either a string or a random item from a list of strings.
     """
-    text = update.message.text.strip().lower()
-    for key, resp in EASTER_EGGS.items():
-        if text.startswith(key.lower()):
-            reply = random.choice(resp) if isinstance(resp, (list, tuple)) else resp
-            await update.message.reply_text(reply)
-            return
+    text = update.message.text.strip()
+    m = _EGG_RE.match(text)
+    if m:
+        resp = _EGG_RESPONSES[m.group(1).lower()]
+        reply = random.choice(resp) if isinstance(resp, (list, tuple)) else resp
+        await update.message.reply_text(reply)
 
 # Add a new user-defined action (like /slap or /hug)
 async def addaction(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -263,7 +391,7 @@ async def addaction(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if len(actions) >= 10000:
         await update.message.reply_text("Cannot add more than 10,000 actions.")
         return
-    if any(a["word"] == word for a in actions):
+    if word in _actions_by_word:  # O(1) instead of scanning the whole list
         await update.message.reply_text(f"The action “{word}” already exists.")
         return
 
@@ -294,30 +422,38 @@ async def user_action(update: Update, context: ContextTypes.DEFAULT_TYPE):
         elif len(parts) > 1 and parts[1].startswith('@'):
             target_name = parts[1]
 
-        actions = load_actions()
-        for a in actions:
-            if a["word"].lower() == word:
-                author = update.effective_user.first_name
-                emoji = a["emoji"]
-                action_text = a["text"]
-                reply = f"{author} {action_text} {emoji}"
-                if target_name:
-                    reply += f" {target_name}"
-                if comment:
-                    reply += f'\n"{comment[:500]}"'
-                await update.message.reply_text(reply)
-                return
+        load_actions()  # Refreshes the word index if the file changed
+        a = _actions_by_word.get(word)  # One dict hit instead of an O(N) scan
+        if a is not None:
+            author = update.effective_user.first_name
+            emoji = a["emoji"]
+            action_text = a["text"]
+            reply = f"{author} {action_text} {emoji}"
+            if target_name:
+                reply += f" {target_name}"
+            if comment:
+                reply += f'\n"{comment[:500]}"'
+            await update.message.reply_text(reply)
+            return
     except Exception as e:
         logger.error(f"[ERROR user_action] Exception: {e}")
         import traceback; traceback.print_exc()
 
+# One entry point for all of this module's per-message work. Registering
+# the counter, action, and easter-egg handlers in three separate groups
+# made the framework filter and dispatch the same update three times;
+# they run back to back here and share the cached weekly/actions state.
+async def text_dispatcher(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    await weekly_count_handler(update, context)
+    await user_action(update, context)
+    await easter_eggs_handler(update, context)
+
 # Register all handlers with the bot
 def register_fun_handlers(app):
     logger.info("››› Registering fun handlers…")
 
-    # Message filters — record message count and actions
-    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, weekly_count_handler), group=0)
-    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, user_action), group=1)
+    # Message filter — weekly counter, actions, and easter eggs in one pass
+    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, text_dispatcher), group=0)
 
     # Commands for weekly top and rewards
     app.add_handler(CommandHandler('weeklytop', weeklytop))
@@ -332,8 +468,8 @@ def register_fun_handlers(app):
     # Command for adding custom actions
     app.add_handler(CommandHandler('addaction', addaction))
 
-    # Final fallback: check for Easter eggs
-    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, easter_eggs_handler), 2)
+    # Flush the cached weekly counters to disk when they changed
+    app.job_queue.run_repeating(_flush_weekly_job, interval=30, first=30)
 
     # Weekly scheduled job every Saturday at 21:00 Paris time
     tz = ZoneInfo('Europe/Paris')
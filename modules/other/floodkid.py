@@ -1,8 +1,9 @@
 import os
-import json
+import sys
+import atexit
+import asyncio
 import random
 import logging
-import threading
 from collections import deque, Counter, defaultdict
 from telegram import Update
 from telegram.ext import ContextTypes, MessageHandler, CommandHandler, filters
@@ -11,43 +12,194 @@ from voxcoinbot import setup_logging
 
 logger = logging.getLogger(__name__)
 
-# Path to the memory file where all stored messages are saved
+# The log lines and snapshots go through the shared orjson-or-stdlib shim
+# (see modules/_json)
+from modules._json import dumps as _dumps, loads as _loads
+
+# Paths to the memory files. New messages go to an append-only .jsonl
+# log — one JSON string per line — so storing a message costs one short
+# write instead of re-dumping the whole memory. A periodic snapshot
+# rewrites the log compactly. The old full-dump .json file is still read
+# on first boot and removed after the first snapshot replaces it.
 BASE_DIR = os.path.dirname(__file__)
-MEMORY_FILE = os.path.join(BASE_DIR, 'flood_memory.json')
+MEMORY_FILE = os.path.join(BASE_DIR, 'flood_memory.json')   # Legacy format
+MEMORY_LOG = os.path.join(BASE_DIR, 'flood_memory.jsonl')
 MAX_MEMORY = 100000  # Max number of messages to store
 
 # Size of the N-gram used to generate responses (e.g., 3-gram means "word pairs → next word")
 N = 3
 
 # Internal state of the flood module
-_memory_lock = threading.Lock()  # Prevents multiple things editing memory at once
-_memory = None           # List of saved messages
+# No lock here: PTB v20 runs handlers on one asyncio thread, and the
+# snapshot job only ever works on a copy of memory taken on that thread,
+# so nothing is shared across threads to protect.
+_memory = None           # deque of saved messages (maxlen evicts the oldest in O(1))
 _memory_set = None       # Same messages as a set (for quick duplicate check)
+
+# Messages are stored pre-split into token tuples: every consumer of
+# memory (the n-gram model, word counts, candidate picks) works on
+# words, and tokenizing each message once at ingest beats re-splitting
+# 100k messages in every traversal. Tokens are also sys.intern'd —
+# chat vocabulary is small and repetitive, so the dict lookups that
+# dominate here (Counter updates, n-gram keys, set membership) get the
+# cached hash and pointer-equality fast path.
+def _tokenize(text: str) -> tuple:
+    return tuple(map(sys.intern, text.split()))
 _last_messages = deque(maxlen=3)  # Stores the last 3 received messages
 _counter = 0             # Counts messages until bot replies
 _next_trigger = random.randint(25, 50)  # How many messages before bot replies
 
 def _load_memory():
     """
-    Loads messages from file if memory is empty.
-    Creates new empty memory if file doesn’t exist.
+    Loads messages if memory is empty: the legacy full-dump file first,
+    then the append-only log replayed line by line (streamed, so the
+    whole file is never held in memory twice). Replay goes through the
+    same dedupe/eviction rules as live messages, so the rebuilt state
+    matches what was in memory when the lines were written.
     """
     global _memory, _memory_set
     if _memory is not None:
         return
+    _memory = deque(maxlen=MAX_MEMORY)
+    _memory_set = set()
+
+    def admit(toks):
+        if toks in _memory_set:
+            return
+        if len(_memory) == MAX_MEMORY:  # append below drops the leftmost
+            _memory_set.discard(_memory[0])
+        _memory.append(toks)
+        _memory_set.add(toks)
+
     if os.path.isfile(MEMORY_FILE):
-        with open(MEMORY_FILE, 'r', encoding='utf-8') as f:
-            _memory = json.load(f)
-    else:
-        _memory = []
-    _memory_set = set(_memory)
+        with open(MEMORY_FILE, 'rb') as f:
+            for text in _loads(f.read()):
+                admit(_tokenize(text))
+    if os.path.isfile(MEMORY_LOG):
+        with open(MEMORY_LOG, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    obj = _loads(line)
+                    # New lines are token arrays; pre-switch lines are
+                    # plain strings and get tokenized here
+                    admit(tuple(map(sys.intern, obj)) if isinstance(obj, list) else _tokenize(obj))
+
+_log_fh = None            # Append handle to the log, opened on first write
+_appends_since_snapshot = 0
+_snapshot_pending = None  # Buffers appends while a snapshot write is in flight
+
+def _append_log(toks: tuple):
+    """
+    Appends one message (as its token array) to the log — O(len(text))
+    instead of the old full-memory JSON dump per message.
+    """
+    global _log_fh, _appends_since_snapshot
+    if _snapshot_pending is not None:
+        # A snapshot is being written off-loop right now. Opening the log
+        # here would grab the pre-replace inode and the line would vanish
+        # when os.replace lands — park it and replay after the replace.
+        _snapshot_pending.append(toks)
+        return
+    if _log_fh is None:
+        _log_fh = open(MEMORY_LOG, 'ab')
+    _log_fh.write(_dumps(list(toks)) + b'\n')
+    _log_fh.flush()
+    _appends_since_snapshot += 1
+
+def _write_snapshot(snapshot):
+    """
+    Rewrites the log as a compact snapshot (dropping lines that were
+    since evicted) and retires the legacy file. Only ever handed a
+    private copy of memory, so it's safe to run off the event loop.
+    """
+    tmp = MEMORY_LOG + '.tmp'
+    with open(tmp, 'wb') as f:
+        for toks in snapshot:
+            f.write(_dumps(list(toks)) + b'\n')
+    os.replace(tmp, MEMORY_LOG)
+    if os.path.isfile(MEMORY_FILE):
+        os.remove(MEMORY_FILE)  # Fully superseded by the snapshot
+
+async def _snapshot_job(context: ContextTypes.DEFAULT_TYPE):
+    global _log_fh, _appends_since_snapshot, _snapshot_pending
+    if not _appends_since_snapshot or _snapshot_pending is not None:
+        return
+    _appends_since_snapshot = 0
+    # Copy and close on the loop so the worker thread shares no state
+    # with the handlers
+    if _log_fh is not None:
+        _log_fh.close()
+        _log_fh = None
+    # Snapshot copied before the await, so messages handled during the
+    # write aren't in it — they land in _snapshot_pending and get
+    # replayed into the fresh log below
+    snapshot = list(_memory)
+    _snapshot_pending = []
+    try:
+        await asyncio.to_thread(_write_snapshot, snapshot)
+    finally:
+        pending, _snapshot_pending = _snapshot_pending, None
+        for toks in pending:
+            _append_log(toks)
+
+def _snapshot_memory():
+    """
+    Synchronous final snapshot for shutdown — the loop is gone by now.
+    """
+    global _log_fh, _appends_since_snapshot
+    if not _appends_since_snapshot or _memory is None:
+        return
+    _appends_since_snapshot = 0
+    if _log_fh is not None:
+        _log_fh.close()
+        _log_fh = None
+    _write_snapshot(list(_memory))
+
+atexit.register(_snapshot_memory)
+
+# Cached 3-gram model. It used to be rebuilt from all of _memory (up to
+# 100k messages) for every generated reply; now it's built once and kept
+# in sync one message at a time as memory changes.
+_ngram_model = None
 
-def _save_memory():
+# Word frequencies across all of memory, maintained the same incremental
+# way — _choose_seed used to recount every word of every stored message
+# per seed pick, inside _generate_reply's retry loop.
+_word_counts = None
+
+def _get_word_counts() -> Counter:
+    global _word_counts
+    if _word_counts is None:
+        _load_memory()
+        _word_counts = Counter()
+        for toks in _memory:
+            _word_counts.update(toks)
+    return _word_counts
+
+def _index_ngrams(words: tuple):
     """
-    Saves the current list of messages to a JSON file.
+    Adds one message's n-grams to the cached model.
     """
-    with open(MEMORY_FILE, 'w', encoding='utf-8') as f:
-        json.dump(_memory, f, ensure_ascii=False)
+    if len(words) < N:
+        return
+    for i in range(len(words) - N):
+        _ngram_model[tuple(words[i:i+N-1])][words[i+N-1]] += 1
+
+def _unindex_ngrams(words: tuple):
+    """
+    Removes one (evicted) message's n-grams from the cached model.
+    """
+    for i in range(len(words) - N):
+        key = tuple(words[i:i+N-1])
+        counts = _ngram_model.get(key)
+        if counts:
+            w = words[i+N-1]
+            if counts[w] <= 1:
+                del counts[w]
+            else:
+                counts[w] -= 1
+            if not counts:
+                del _ngram_model[key]
 
 def _add_message(text: str):
     """
@@ -55,69 +207,87 @@ def _add_message(text: str):
     If memory is full, deletes the oldest message.
     """
     logger.debug("_add_message called with text=%r", text)
-    _load_memory()
-    if text in _memory_set:
+    toks = _tokenize(text)
+    if toks in _memory_set:
         return
-    _memory.append(text)
-    _memory_set.add(text)
-    if len(_memory) > MAX_MEMORY:
-        old = _memory.pop(0)
+    # At capacity the deque drops its leftmost on append for free — grab
+    # it first so the indexes can be kept in sync
+    old = _memory[0] if len(_memory) == MAX_MEMORY else None
+    _memory.append(toks)
+    _memory_set.add(toks)
+    if _ngram_model is not None:
+        _index_ngrams(toks)
+    if _word_counts is not None:
+        _word_counts.update(toks)
+    if old is not None:
         _memory_set.remove(old)
-    _save_memory()
+        if _ngram_model is not None:
+            _unindex_ngrams(old)
+        if _word_counts is not None:
+            for w in old:
+                if _word_counts[w] <= 1:  # Drop zeroes so the Counter can't bloat
+                    del _word_counts[w]
+                else:
+                    _word_counts[w] -= 1
+    _append_log(toks)
 
 def _build_ngram_model():
     """
-    Builds a 3-gram model from the stored messages.
-    Each pair of words is mapped to possible next words.
+    Returns the cached 3-gram model, building it from stored messages on
+    first use. Each pair of words maps to a Counter of next words, so a
+    continuation seen many times costs one entry, not one per sighting.
     """
-    model = defaultdict(list)
-    for msg in _memory:
-        words = msg.split()
-        if len(words) < N:
-            continue
-        for i in range(len(words) - N):
-            key = tuple(words[i:i+N-1])
-            next_word = words[i+N-1]
-            model[key].append(next_word)
-    return model
+    global _ngram_model
+    if _ngram_model is None:
+        _load_memory()
+        _ngram_model = defaultdict(Counter)
+        for toks in _memory:
+            _index_ngrams(toks)
+    return _ngram_model
 
 def _choose_seed():
     """
     Picks a rare word from the last 3 user messages.
     The rarer the word is in memory, the more likely it's picked.
     """
-    _load_memory()
     recent = []
     for msg in _last_messages:
         recent.extend(msg.split())
     if not recent:
         return None
-    counts = Counter()
-    for msg in _memory:
-        counts.update(msg.split())
-    unique = set(recent)
-    rare = sorted(unique, key=lambda w: counts.get(w, 0))
-    return random.choice(rare)
+    counts = _get_word_counts()
+    # Weight each candidate by inverse frequency so rarity actually
+    # shifts the odds — the old sort-then-uniform-choice made frequency
+    # matter only for tie ordering
+    unique = list(set(recent))
+    weights = [1.0 / (counts.get(w, 0) + 1) for w in unique]
+    return random.choices(unique, weights=weights, k=1)[0]
 
-def _generate_text(seed: str, length: int = 20) -> str:
+def _generate_text(seed: str, length: int = 20, model=None) -> str:
     """
     Generates a sentence using the 3-gram model starting from the seed word(s).
     If the seed is too short, fills in with random known words.
+    Callers that generate several attempts pass the model in so it's
+    resolved once per command rather than once per attempt.
     """
-    model = _build_ngram_model()
+    if model is None:
+        model = _build_ngram_model()
     words = seed.split()
     if len(words) < N-1:
-        candidates = [msg for msg in _memory if len(msg.split()) >= N-1]
+        candidates = [toks for toks in _memory if len(toks) >= N-1]
         if candidates:
-            words = random.choice(candidates).split()[:N-1]
+            words = list(random.choice(candidates)[:N-1])
     gen = words[-(N-1):]
     output = gen.copy()
     for _ in range(length):
         key = tuple(gen[-(N-1):])
-        choices = model.get(key)
-        if not choices:
+        counts = model.get(key)
+        if not counts:
             break
-        next_word = random.choice(choices)
+        # Weighted draw over unique continuations — same distribution
+        # as the old duplicated list, a fraction of the memory
+        cands, weights = zip(*counts.items())
+        next_word = random.choices(cands, weights=weights, k=1)[0]
         output.append(next_word)
         gen.append(next_word)
     return ' '.join(output)
@@ -128,15 +298,16 @@ def _generate_reply(min_words: int = 5, max_words: int = 25) -> str:
     of at least `min_words` and up to `max_words`.
     """
     reply = ''
+    model = _build_ngram_model()  # Once for all attempts below
     for _ in range(10):
         seed = _choose_seed()
-        text = _generate_text(seed, length=max_words)
+        text = _generate_text(seed, length=max_words, model=model)
         words = text.split()
         if len(words) >= min_words:
             reply = ' '.join(words[:max_words])
             break
     if not reply:
-        text = _generate_text('', length=max_words)
+        text = _generate_text('', length=max_words, model=model)
         words = text.split()
         reply = ' '.join(words[:max_words])
     return reply
@@ -149,8 +320,7 @@ async def flood_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     global _counter, _next_trigger
     text = update.message.text.strip()
     logger.info("flood_handler message=%r", text)
-    with _memory_lock:
-        _add_message(text)
+    _add_message(text)
     _last_messages.append(text)
     _counter += 1
     if _counter >= _next_trigger:
@@ -203,6 +373,13 @@ def register_kid_handlers(app):
     """
     Adds all FloodKid-related message and command handlers to the bot.
     """
+    # Memory is loaded up front so the per-message path doesn't pay the
+    # lazy-load guard — _add_message can assume it's there
+    _load_memory()
+
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, flood_handler), 3)
     app.add_handler(CommandHandler('kidsay', kidsay))
     app.add_handler(CommandHandler('kiddebug', kiddebug))
+
+    # Compact the append-only memory log every 10 minutes
+    app.job_queue.run_repeating(_snapshot_job, interval=600, first=600)
@@ -1,17 +1,27 @@
 # --- Basic imports ---
 import re                # For working with regular expressions (like checking if a string looks like "+10")
 import os                # For dealing with file paths and environment variables
+import atexit            # To flush unsaved data when the bot shuts down
+import asyncio           # To push disk writes off the event loop
 import sys               # For exiting the script if needed
 import json              # To save and load user data in JSON format
 import logging           # To log events and errors for debugging
-import threading         # So we can lock access to data when multiple things happen at once
 import time              # Time-related functions (like waiting or timestamps)
 import secrets           # Secure random code generation
+import tempfile          # Unique temp names for atomic data writes
 import pytz              # Time zone support
 import subprocess        # (Not used in this script yet, but allows running other programs)
+from bisect import bisect_right  # Binary search for the level thresholds
+from collections import deque, Counter  # Bounded log-trim buffer; message counters
+from heapq import nlargest       # Top-N selection without sorting everyone
 from pathlib import Path # Easier way to handle file paths across OS
 from dotenv import load_dotenv  # Loads environment variables (like your bot token) from a .env file
 
+# Fast JSON for data.json — the chats→users dict is the biggest blob this
+# bot (de)serializes. One shared shim: orjson when installed, compact
+# stdlib fallback otherwise (see modules/_json).
+from modules._json import dumps as _dumps, loads as _loads
+
 # --- Telegram bot imports ---
 from telegram import Update, User  # Represents a message and user in a Telegram chat
 from telegram.ext import (
@@ -27,15 +37,19 @@ from datetime import datetime, timedelta  # Working with date/time
 from zoneinfo import ZoneInfo  # Timezone support for newer Python versions
 
 # --- File setup ---
-BASE_DIR = Path(__file__).resolve().parent  # The folder this file is in
-DATA_FILE = os.path.join(BASE_DIR / 'data' / 'data.json')  # Where we'll save user data
-LOG_DIR = os.path.join(BASE_DIR / 'data' / 'logs')         # Folder for logs
-STOP_FILE = os.path.join(BASE_DIR, 'stop.txt')             # A file that might be used to stop the bot (not in this version)
+BASE_DIR = Path(__file__).resolve().parent        # The folder this file is in
+DATA_FILE = BASE_DIR / 'data' / 'data.json'       # Where we'll save user data
+LOG_DIR = BASE_DIR / 'data' / 'logs'              # Folder for logs
+STOP_FILE = BASE_DIR / 'stop.txt'                 # A file that might be used to stop the bot (not in this version)
 SCRIPT = os.path.abspath(__file__)                         # The full path to this script itself
 
 # Replace with your real Telegram ID to unlock admin-only commands
 ADMIN_ID = "write ur telegram ID"
 
+# Compiled once — /cmp and /tvchange validate their "+N"/"-N" argument with
+# this on every call, so skip the per-call regex-cache lookup.
+_DELTA_RE = re.compile(r'[+-]\d+')
+
 # --- Logging setup ---
 logger = logging.getLogger(__name__)
 os.makedirs(LOG_DIR, exist_ok=True)  # Make sure the logs folder exists
@@ -48,22 +62,30 @@ def setup_logging(LOG_DIR: str):
     os.makedirs(LOG_DIR, exist_ok=True)
     log_file = os.path.join(LOG_DIR, 'bot.log')
 
-    # Trim the log file if it's too long
+    # Trim the log file if it's too long. A bounded deque keeps only the
+    # last 500 lines while streaming, instead of pulling the whole file
+    # into a list first; staying in bytes skips a decode/encode round trip.
     try:
-        with open(log_file, 'r', encoding='utf-8', errors='ignore') as f:
-            lines = f.readlines()
-        if len(lines) > 500:
-            with open(log_file, 'w', encoding='utf-8') as f:
-                f.writelines(lines[-500:])
+        tail = deque(maxlen=500)
+        count = 0
+        with open(log_file, 'rb') as f:
+            for line in f:
+                tail.append(line)
+                count += 1
+        if count > 500:
+            with open(log_file, 'wb') as f:
+                f.write(b''.join(tail))
     except FileNotFoundError:
         pass  # No log file yet, no problem
     except Exception as e:
-        logging.warning(f"Couldn't trim log file: {e}")
+        logging.warning("Couldn't trim log file: %s", e)
 
-    # Set up file logging
+    # Set up file logging. INFO by default — DEBUG wrote a line for every
+    # single message the bot saw, which both bloats the file and pays the
+    # formatting cost per record. Set LOG_DEBUG=1 to get the firehose back.
     logging.basicConfig(
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        level=logging.DEBUG,
+        level=logging.DEBUG if os.getenv('LOG_DEBUG') else logging.INFO,
         filename=log_file,
         filemode='a',
     )
@@ -76,85 +98,216 @@ def setup_logging(LOG_DIR: str):
     logging.getLogger().addHandler(console)
 
 # --- Data handling ---
-data_lock = threading.Lock()  # This prevents race conditions when saving data at the same time
+# No lock needed here: run_polling drives every handler and the flush job on
+# one asyncio event loop, so nothing ever touches the data dict or the file
+# from two threads at once. (The old threading.Lock paid for an OS mutex on
+# every save to guard against concurrency that can't happen.)
+
+# The parsed data.json lives here after the first load. Every handler used to
+# re-read and re-parse the whole file from disk on every single update, which
+# is pure waste — the bot is the only writer, so the dict in memory is always
+# the truth. Handlers that change something call mark_dirty() and a repeating
+# job writes the file out in the background.
+_DATA = None
+_data_dirty = False
 
 def load_data():
     """
-    Loads the JSON file with all user data.
+    Returns the in-memory user data, reading the JSON file only on first call.
     If the file doesn't exist or fails, starts fresh with default data.
     """
-    logging.debug(f"Loading data from {DATA_FILE}")
+    global _DATA
+    if _DATA is None:
+        logging.debug("Loading data from %s", DATA_FILE)
+        try:
+            with open(DATA_FILE, 'rb') as f:
+                _DATA = _loads(f.read())
+        except FileNotFoundError:
+            _DATA = {'chats': {}, 'code': ''}
+        except Exception as e:
+            logging.exception('Failed to load data.json: %s', e)
+            _DATA = {'chats': {}, 'code': ''}
+        else:
+            # In memory the message stats use Counter/set so the per-message
+            # hot path is single-lookup; the encode step flattens them back
+            # to plain JSON types.
+            for chat in _DATA['chats'].values():
+                ms = chat.get('message_stats')
+                if ms is not None:
+                    ms['counts'] = Counter(ms['counts'])
+                    ms['awarded'] = set(ms['awarded'])
+    return _DATA
+
+# Set DEBUG_JSON=1 to keep data.json pretty-printed (handy for poking at it
+# by hand). Compact output is noticeably smaller and faster to encode.
+_DEBUG_JSON = bool(os.getenv('DEBUG_JSON'))
+
+def _encode_data(data) -> bytes:
+    """Serializes the data blob to the bytes that go on disk."""
+    # Flatten the in-memory Counter/set stats back to plain dict/list via a
+    # shallow overlay, so the live dict is never touched and everything
+    # else is shared, not copied.
+    fixed = {
+        cid: {**chat, 'message_stats': {
+            **chat['message_stats'],
+            'counts': dict(chat['message_stats']['counts']),
+            'awarded': list(chat['message_stats']['awarded']),
+        }}
+        for cid, chat in data['chats'].items()
+        if 'message_stats' in chat
+    }
+    if fixed:
+        data = {**data, 'chats': {**data['chats'], **fixed}}
+    if _DEBUG_JSON:
+        return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+    return _dumps(data)
+
+def _write_payload(payload: bytes):
+    """
+    Writes already-serialized bytes via a temp file + os.replace, so a
+    crash mid-write can never leave a half-written data.json behind.
+    The temp name is unique per call: the threaded flush job and the
+    synchronous save_data callers (module handlers, startup) can overlap,
+    and a shared .tmp path would let one truncate the other's
+    half-written file right before the rename publishes it.
+    Touches no shared state, so it's safe to run in a worker thread.
+    """
+    fd, tmp = tempfile.mkstemp(dir=DATA_FILE.parent, prefix=DATA_FILE.name + '.', suffix='.tmp')
     try:
-        with open(DATA_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {'chats': {}, 'code': ''}
-    except Exception as e:
-        logging.exception('Failed to load data.json: %s', e)
-        time.sleep(1.5)
-        return {'chats': {}, 'code': ''}
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, DATA_FILE)
+    except Exception:
+        try:
+            os.unlink(tmp)  # Don't leave orphaned temp files behind
+        except OSError:
+            pass
+        raise
 
 def save_data(data):
     """
-    Saves the updated user data to the JSON file.
-    Uses a lock so it doesn't break if multiple things try to write at once.
+    Saves the updated user data to the JSON file (synchronously).
+    The background flush job prefers the threaded path below; this stays
+    for module callers and the shutdown hook.
     """
-    with data_lock:
-        try:
-            with open(DATA_FILE, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-        except Exception:
-            logging.exception('Failed to save data.json')
-            time.sleep(1.5)
+    global _data_dirty
+    try:
+        _write_payload(_encode_data(data))
+        _data_dirty = False
+    except Exception:
+        logging.exception('Failed to save data.json')
+
+def mark_dirty():
+    """
+    Notes that the in-memory data changed and needs to hit disk.
+    The actual write happens in the background flush job (or at exit).
+    """
+    global _data_dirty
+    _data_dirty = True
+
+async def _flush_data_job(context: ContextTypes.DEFAULT_TYPE):
+    """
+    Repeating job: persist the data blob if any handler changed it.
+    Encoding happens here on the loop (so the bytes are a consistent
+    snapshot), but the write + fsync — the part that actually blocks —
+    runs in a worker thread and never stalls message handling.
+    """
+    global _data_dirty
+    if not _data_dirty:
+        return
+    # Clear the flag before encoding: anything mutated while the write is
+    # in flight re-marks the data and gets picked up next interval.
+    _data_dirty = False
+    payload = _encode_data(_DATA)
+    try:
+        await asyncio.to_thread(_write_payload, payload)
+    except Exception:
+        logging.exception('Failed to save data.json')
+        _data_dirty = True
+
+def _flush_data_now():
+    """Last-chance synchronous flush so a shutdown doesn't eat changes."""
+    if _data_dirty and _DATA is not None:
+        save_data(_DATA)
+
+atexit.register(_flush_data_now)
 
 def get_chat(data, chat_id: str):
     """
     Makes sure this chat has a space in the data file.
     If not, creates a new entry with empty user list and no privileges.
     """
-    if chat_id not in data['chats']:
-        data['chats'][chat_id] = {'users': {}, 'privileged': []}
-    return data['chats'][chat_id]
+    chat = data['chats'].get(chat_id)
+    if chat is None:
+        chat = data['chats'][chat_id] = {'users': {}, 'privileged': []}
+    return chat
 
-def update_chat_user(data, chat_id: str, user: User):
+def _username_index(chat):
+    """
+    Reverse map of '@username' (lowercased) → user ID for one chat.
+    Built lazily the first time a chat needs it (old data files don't have
+    it) and kept up to date by update_chat_user on every rename.
+    """
+    idx = chat.get('username_index')
+    if idx is None:
+        idx = chat['username_index'] = {
+            ('@' + info['username']).lower(): uid
+            for uid, info in chat['users'].items()
+            if info['username']
+        }
+    return idx
+
+def update_chat_user(data, chat_id: str, user: User) -> str:
     """
     Makes sure this user is registered in the current chat.
     Adds them if they aren’t, or updates their username if they changed it.
+    Returns the user's string ID so callers don't re-stringify user.id.
     """
     chat = get_chat(data, chat_id)
     uid = str(user.id)
+    name = user.username or user.full_name
     if uid not in chat['users']:
         chat['users'][uid] = {
-            'username': user.username or user.full_name,
+            'username': name,
             'balance': 0,
             'voxcent': 0,
             'tvcoin': 0
         }
-    else:
-        chat['users'][uid]['username'] = user.username or user.full_name
-
-def _ensure_message_stats(chat: dict):
+        _username_index(chat)[('@' + name).lower()] = uid
+        mark_dirty()
+    elif chat['users'][uid]['username'] != name:
+        idx = _username_index(chat)
+        old_name = chat['users'][uid]['username']
+        if old_name:
+            idx.pop(('@' + old_name).lower(), None)
+        chat['users'][uid]['username'] = name
+        idx[('@' + name).lower()] = uid
+        mark_dirty()
+    return uid
+
+def _ensure_message_stats(chat: dict, now: float):
     """
     Makes sure the chat has a structure to track how many messages users send.
     This is used to give out free coins for being active.
     """
     if 'message_stats' not in chat:
         chat['message_stats'] = {
-            'last_reset': datetime.now(datetime.timezone.utc).timestamp(),
-            'counts': {},      # user_id → how many messages they sent
-            'awarded': []      # list of user_ids that already got their reward today
+            'last_reset': now,
+            'counts': Counter(),  # user_id → how many messages they sent
+            'awarded': set()      # user_ids that already got their reward today
         }
 
-def _check_and_reset_stats(chat: dict):
+def _check_and_reset_stats(chat: dict, now: float):
     """
     Every 24 hours, resets the message counters and the list of who got coins.
     """
-    now = datetime.now(datetime.timezone.utc).timestamp()
-    last = chat['message_stats']['last_reset']
-    if now - last >= 86400:  # 24 hours in seconds
-        chat['message_stats']['last_reset'] = now
-        chat['message_stats']['counts'].clear()
-        chat['message_stats']['awarded'].clear()
+    stats = chat['message_stats']
+    if now - stats['last_reset'] >= 86400:  # 24 hours in seconds
+        stats['last_reset'] = now
+        stats['counts'].clear()
+        stats['awarded'].clear()
 
 def update_message_stats_and_award(data: dict, chat_id: str, user_id: str) -> bool:
     """
@@ -162,16 +315,27 @@ def update_message_stats_and_award(data: dict, chat_id: str, user_id: str) -> bo
     Increases their message count. If they hit 1000 messages in 24h,
     gives them a 10-coin reward — but only once per day.
     """
+    # One clock read per message. time.time() is already UTC-based, and the
+    # old datetime.now(datetime.timezone.utc) call didn't even work —
+    # datetime.timezone is the class, not a tzinfo instance.
+    now = time.time()
     chat = get_chat(data, chat_id)
-    _ensure_message_stats(chat)
-    _check_and_reset_stats(chat)
+    _ensure_message_stats(chat, now)
+    _check_and_reset_stats(chat, now)
 
     stats = chat['message_stats']
-    stats['counts'][user_id] = stats['counts'].get(user_id, 0) + 1
+    # Already rewarded today → nothing left to count toward. The heaviest
+    # chatters hit this branch for the rest of the day, so bail before the
+    # counter bump (which would also mark the data dirty every message).
+    if user_id in stats['awarded']:
+        return False
 
-    if stats['counts'][user_id] >= 1000 and user_id not in stats['awarded']:
+    stats['counts'][user_id] += 1  # Counter: missing keys start at 0
+    mark_dirty()
+
+    if stats['counts'][user_id] >= 1000:
         chat['users'][user_id]['balance'] += 10
-        stats['awarded'].append(user_id)
+        stats['awarded'].add(user_id)
         return True
     return False
 
@@ -179,36 +343,31 @@ def find_user_by_mention(chat, mention: str):
     """
     Finds a user in the chat by their @username.
     Returns the user ID if found, otherwise None.
+    One dict lookup instead of scanning every user in the chat.
     """
-    for uid, info in chat['users'].items():
-        if info['username'] and ('@' + info['username']).lower() == mention.lower():
-            return uid
-    return None
-
-def get_level(balance: str) -> int:
+    idx = _username_index(chat)
+    uid = idx.get(mention.lower())
+    if uid is None:
+        # The casino module creates user records without going through
+        # update_chat_user, so the index can be missing someone. Fall back
+        # to one scan and remember the answer for next time.
+        for scan_uid, info in chat['users'].items():
+            if info['username'] and ('@' + info['username']).lower() == mention.lower():
+                idx[('@' + info['username']).lower()] = scan_uid
+                return scan_uid
+    return uid
+
+# Balance cutoffs for each level, used with bisect instead of a ten-branch
+# elif chain. bisect_right gives the index of the first threshold above the
+# balance, which is exactly the level name to show.
+LEVEL_THRESHOLDS = (300, 500, 800, 1000, 1300, 1500, 1800, 2000, 5000)
+LEVEL_NAMES = tuple(f"level {i}" for i in range(1, 11))
+
+def get_level(balance: float) -> str:
     """
     Converts a user's balance into a level. Just for fun/ranking.
     """
-    if balance < 300:
-        return "level 1"
-    elif balance < 500:
-        return "level 2"
-    elif balance < 800:
-        return "level 3"
-    elif balance < 1000:
-        return "level 4"
-    elif balance < 1300:
-        return "level 5"
-    elif balance < 1500:
-        return "level 6"
-    elif balance < 1800:
-        return "level 7"
-    elif balance < 2000:
-        return "level 8"
-    elif balance < 5000:
-        return "level 9"
-    else:
-        return "level 10"
+    return LEVEL_NAMES[bisect_right(LEVEL_THRESHOLDS, balance)]
 
 # /voxstart — Starts the bot and registers the user
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -217,23 +376,19 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         user = update.effective_user
         chat_id = str(update.effective_chat.id)
         data = load_data()
-        update_chat_user(data, chat_id, user)
-        save_data(data)
-        uid = str(user.id)
+        uid = update_chat_user(data, chat_id, user)
         user_rec = data['chats'][chat_id]['users'][uid]
         bal = user_rec['balance']
         lvl = get_level(bal)
         sig = user_rec.get('signature', '')
     
-        text = f"Hello, {user.first_name}!\n"
-        text += f"Level: {lvl}\n"
+        lines = [f"Hello, {user.first_name}!", f"Level: {lvl}"]
         if sig:
-            text += f"Signature: {sig}\n"
-        text += f"Your balance: {bal} voxcoins."
-        await update.message.reply_text(text)
+            lines.append(f"Signature: {sig}")
+        lines.append(f"Your balance: {bal} voxcoins.")
+        await update.message.reply_text("\n".join(lines))
     except Exception:
         logging.exception('Error in start handler')
-        time.sleep(1.5)
 
 # /voxbalance — Check balance (your own or someone else’s)
 async def balance(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -242,7 +397,7 @@ async def balance(update: Update, context: ContextTypes.DEFAULT_TYPE):
         user = update.effective_user
         chat_id = str(update.effective_chat.id)
         data = load_data()
-        update_chat_user(data, chat_id, user)
+        sender_uid = update_chat_user(data, chat_id, user)
         chat = get_chat(data, chat_id)
         args = context.args
 
@@ -260,30 +415,27 @@ async def balance(update: Update, context: ContextTypes.DEFAULT_TYPE):
             lvl = get_level(bal)
             sig = user_rec.get('signature', '')
             name = user_rec['username']
-            text = f"Profile of {name}:\n"
-            text += f"Level: {lvl}\n\n"
+            lines = [f"Profile of {name}:", f"Level: {lvl}", ""]
             if sig:
-                text += f"Signature: {sig}\n\n"
-            text += f"Voxcoins: {bal}\nVoxcents: {voxcent}\nTVcoins: {tvcoin}"
-            await update.message.reply_text(text)
+                lines += [f"Signature: {sig}", ""]
+            lines.append(f"Voxcoins: {bal}\nVoxcents: {voxcent}\nTVcoins: {tvcoin}")
+            await update.message.reply_text("\n".join(lines))
         else:
             # Check your own balance
-            uid = str(user.id)
-            user_rec = chat['users'][uid]
+            user_rec = chat['users'][sender_uid]
             bal = user_rec['balance']
             lvl = get_level(bal)
             sig = user_rec.get('signature', '')
             voxcent = user_rec.get('voxcent', 0)
             tvcoin = user_rec.get('tvcoin', 0)
-            text = f"Level: {lvl}\n\n"
+            lines = [f"Level: {lvl}", ""]
             if sig:
-                text += f"Signature: {sig}\n\n"
-            text += f"Your balance:\n\n{bal} voxcoins\n{voxcent} voxcents\n{tvcoin} TVcoins"
-            await update.message.reply_text(text)
+                lines += [f"Signature: {sig}", ""]
+            lines.append(f"Your balance:\n\n{bal} voxcoins\n{voxcent} voxcents\n{tvcoin} TVcoins")
+            await update.message.reply_text("\n".join(lines))
 
     except Exception:
         logging.exception('Error in balance handler')
-        time.sleep(1.5)
 
 # /signa <text> — Set a profile signature
 async def signa(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -294,16 +446,15 @@ async def signa(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = str(update.effective_chat.id)
     data = load_data()
     chat = get_chat(data, chat_id)
-    update_chat_user(data, chat_id, user)
+    uid = update_chat_user(data, chat_id, user)
 
-    uid = str(user.id)
     text = " ".join(context.args).strip()
     if not text:
         await update.message.reply_text("Usage: /signa <your signature text>")
         return
 
     chat['users'][uid]['signature'] = text
-    save_data(data)
+    mark_dirty()
     await update.message.reply_text(f"Your signature has been set to: {text}")
 
 # /add @user amount — Give voxcoins (VOX-admin only)
@@ -331,13 +482,12 @@ async def add(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await update.message.reply_text("User not found.")
             return
 
-        chat['users'][uid]['balance'] += amount
-        save_data(data)
-        name = chat['users'][uid]['username']
-        await update.message.reply_text(f"✅ Added {amount} voxcoins to {name}.")
+        rec = chat['users'][uid]
+        rec['balance'] += amount
+        mark_dirty()
+        await update.message.reply_text(f"✅ Added {amount} voxcoins to {rec['username']}.")
     except Exception:
         logging.exception('Error in add handler')
-        time.sleep(1.5)
 
 # /remove @user amount — Take away voxcoins (VOX-admin only)
 async def remove(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -363,13 +513,12 @@ async def remove(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await update.message.reply_text("User not found.")
             return
 
-        chat['users'][uid]['balance'] -= amount
-        save_data(data)
-        name = chat['users'][uid]['username']
-        await update.message.reply_text(f"❌ Removed {amount} voxcoins from {name}.")
+        rec = chat['users'][uid]
+        rec['balance'] -= amount
+        mark_dirty()
+        await update.message.reply_text(f"❌ Removed {amount} voxcoins from {rec['username']}.")
     except Exception:
         logging.exception('Error in remove handler')
-        time.sleep(1.5)
 
 # /voxtop — Show top 30 richest users in the chat
 async def top(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -380,17 +529,19 @@ async def top(update: Update, context: ContextTypes.DEFAULT_TYPE):
         chat = get_chat(data, chat_id)
         users = chat['users']
 
-        # Sort users by balance in descending order
-        top30 = sorted(users.items(), key=lambda kv: kv[1]['balance'], reverse=True)[:30]
-
-        text = "🏆 Top 30 Users by Balance:\n"
-        for i, (uid, info) in enumerate(top30, 1):
-            text += f"{i}. {info['username']}: {info['balance']} voxcoins\n"
+        # Pick the 30 richest users. nlargest keeps a 30-element heap while
+        # scanning, so this stays cheap even when the chat has far more
+        # users than places on the board.
+        top30 = nlargest(30, users.items(), key=lambda kv: kv[1]['balance'])
 
-        await update.message.reply_text(text)
+        lines = ["🏆 Top 30 Users by Balance:"]
+        lines.extend(
+            f"{i}. {info['username']}: {info['balance']} voxcoins"
+            for i, (uid, info) in enumerate(top30, 1)
+        )
+        await update.message.reply_text("\n".join(lines))
     except Exception:
         logging.exception('Error in top handler')
-        time.sleep(1.5)
 
 # /vox <code> — Enter secret code to become a privileged user
 async def vox(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -414,14 +565,13 @@ async def vox(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
             new_code = secrets.token_urlsafe(8)
             data['code'] = new_code  # generate new code so no one can reuse
-            save_data(data)
+            mark_dirty()
             print(f"New vox code: {new_code}")
             await update.message.reply_text("✅ Access granted. You can now use admin commands.")
         else:
             await update.message.reply_text("Invalid code.")
     except Exception:
         logging.exception('Error in vox handler')
-        time.sleep(1.5)
 
 # /payto @user amount — Transfer coins to another user
 async def payto(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -430,7 +580,7 @@ async def payto(update: Update, context: ContextTypes.DEFAULT_TYPE):
         user = update.effective_user
         chat_id = str(update.effective_chat.id)
         data = load_data()
-        update_chat_user(data, chat_id, user)
+        sender_id = update_chat_user(data, chat_id, user)
         args = context.args
 
         if len(args) < 2:
@@ -439,25 +589,73 @@ async def payto(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
         mention, amount = args[0], float(args[1])
         chat = get_chat(data, chat_id)
-        sender_id = str(user.id)
         uid = find_user_by_mention(chat, mention)
         if not uid:
             await update.message.reply_text("User not found.")
             return
-        if chat['users'][sender_id]['balance'] < amount:
+        sender = chat['users'][sender_id]
+        if sender['balance'] < amount:
             await update.message.reply_text("Insufficient funds.")
             return
 
-        chat['users'][sender_id]['balance'] -= amount
-        chat['users'][uid]['balance'] += amount
-        save_data(data)
-        name = chat['users'][uid]['username']
+        recipient = chat['users'][uid]
+        sender['balance'] -= amount
+        recipient['balance'] += amount
+        mark_dirty()
         await update.message.reply_text(
-            f"{user.first_name} sent {amount} voxcoins to {name}."
+            f"{user.first_name} sent {amount} voxcoins to {recipient['username']}."
         )
     except Exception:
         logging.exception('Error in payto handler')
-        time.sleep(1.5)
+
+# The /voxhelp text never changes at runtime, so build it once at import
+# instead of inside the handler.
+HELP_TEXT = (
+    "— Voxbank Commands —\n"
+    "/voxhelp — show this message\n"
+    "/voxstart — register and check your balance\n"
+    "/vox <code> — gain admin access with a secret code\n"
+    "/payto @user <amount> — send voxcoins to someone\n"
+    "/voxbalance OR /voxbalance @user — check your or someone else's balance\n"
+    "/signa <text> — set a profile signature\n"
+    "/voxtop — view the top 30 richest users\n"
+    "/add @user <amount> — add voxcoins to user (requires admin access)\n"
+    "/remove @user <amount> — remove voxcoins from user (requires admin access)\n"
+    "/voxactivetop — show top 3 users by message count over the week\n"
+    "\n"
+    "— Extras —\n"
+    "/topic — get a random conversation topic\n"
+    "/addnewtopic — add your own topic to the list\n"
+    "/song — pick a random song from the list\n"
+    "/addsong <title by artist> — add your song to the list\n"
+    "/kidsay — ask the flood neural net to say something (WIP)\n"
+    "/addaction <action>|<emoji>|<description> — add custom actions (up to 10k stored)\n"
+    "\n"
+    "— UNO Game —\n"
+    "/uno_start — begin recruitment for UNO game\n"
+    "/uno_join — join an ongoing UNO game\n"
+    "/uno_begin — start the game\n"
+    "/uno_hand — send your cards privately\n"
+    "/uno_play <color> <number|skip|reverse|+2> — play a card\n"
+    "/uno_play wild <color> or /uno_play wild4 <color> — play wild cards\n"
+    "/uno_draw — draw a card and skip your turn\n"
+    "/uno_top10 — view top 10 UNO players\n"
+    "/uno_status — see if there’s an active game\n"
+    "/uno_reset — reset the game\n"
+    "\n"
+    "— Nonsense Game —\n"
+    "/start_nonsense — begin recruitment\n"
+    "/nonsense_join — join the game\n"
+    "/nonsense_begin — start the game\n"
+    "/nonsense <answer text> — SEND IN PRIVATE MESSAGE! continue the story\n"
+    "\n"
+    "— Casino —\n"
+    "/casino — open casino menu\n"
+    "/slots — play slots (minimum 50 voxcents)\n"
+    "/dice — roll dice (minimum 50 voxcents)\n"
+    "/roulette — spin the roulette (choose number 0-36 and bet)\n"
+            "(Also shows top gamblers in /casino)"
+)
 
 # /voxhelp — Shows all available bot commands
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -467,56 +665,9 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     logger.info("help_command called")
     try:
-        text = (
-            "— Voxbank Commands —\n"
-            "/voxhelp — show this message\n"
-            "/voxstart — register and check your balance\n"
-            "/vox <code> — gain admin access with a secret code\n"
-            "/payto @user <amount> — send voxcoins to someone\n"
-            "/voxbalance OR /voxbalance @user — check your or someone else's balance\n"
-            "/signa <text> — set a profile signature\n"
-            "/voxtop — view the top 30 richest users\n"
-            "/add @user <amount> — add voxcoins to user (requires admin access)\n"
-            "/remove @user <amount> — remove voxcoins from user (requires admin access)\n"
-            "/voxactivetop — show top 3 users by message count over the week\n"
-            "\n"
-            "— Extras —\n"
-            "/topic — get a random conversation topic\n"
-            "/addnewtopic — add your own topic to the list\n"
-            "/song — pick a random song from the list\n"
-            "/addsong <title by artist> — add your song to the list\n"
-            "/kidsay — ask the flood neural net to say something (WIP)\n"
-            "/addaction <action>|<emoji>|<description> — add custom actions (up to 10k stored)\n"
-            "\n"
-            "— UNO Game —\n"
-            "/uno_start — begin recruitment for UNO game\n"
-            "/uno_join — join an ongoing UNO game\n"
-            "/uno_begin — start the game\n"
-            "/uno_hand — send your cards privately\n"
-            "/uno_play <color> <number|skip|reverse|+2> — play a card\n"
-            "/uno_play wild <color> or /uno_play wild4 <color> — play wild cards\n"
-            "/uno_draw — draw a card and skip your turn\n"
-            "/uno_top10 — view top 10 UNO players\n"
-            "/uno_status — see if there’s an active game\n"
-            "/uno_reset — reset the game\n"
-            "\n"
-            "— Nonsense Game —\n"
-            "/start_nonsense — begin recruitment\n"
-            "/nonsense_join — join the game\n"
-            "/nonsense_begin — start the game\n"
-            "/nonsense <answer text> — SEND IN PRIVATE MESSAGE! continue the story\n"
-            "\n"
-            "— Casino —\n"
-            "/casino — open casino menu\n"
-            "/slots — play slots (minimum 50 voxcents)\n"
-            "/dice — roll dice (minimum 50 voxcents)\n"
-            "/roulette — spin the roulette (choose number 0-36 and bet)\n"
-            "(Also shows top gamblers in /casino)"
-        )
-        await update.message.reply_text(text)
+        await update.message.reply_text(HELP_TEXT)
     except Exception:
         logging.exception("Error in help_command")
-        time.sleep(1.5)
 
 # /cmp +N or /cmp -N — Adjust voxcents for all users (admin only)
 async def compensation(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -530,7 +681,7 @@ async def compensation(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     # Validate argument: must be +N or -N
-    if not context.args or not re.match(r'^[+-]\d+$', context.args[0]):
+    if not context.args or not _DELTA_RE.fullmatch(context.args[0]):
         await update.message.reply_text("Usage: /cmp +<number> or -<number>")
         return
 
@@ -541,15 +692,17 @@ async def compensation(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat = get_chat(data, chat_id)
     count = 0
 
-    # Apply change to each user
+    # Apply change to each user. The loop runs over the whole chat, so bind
+    # max locally once — global builtin lookups per iteration add up here.
+    _max = max
     for rec in chat['users'].values():
         old_vc = rec.get('voxcent', 0)
-        new_vc = max(old_vc + delta, 0)
+        new_vc = _max(old_vc + delta, 0)
         if new_vc != old_vc:
             rec['voxcent'] = new_vc
             count += 1
 
-    save_data(data)
+    mark_dirty()
     await update.message.reply_text(f"✅ Compensation of {delta} voxcents applied to {count} users.")
 
 # /tvchange @user +N or /tvchange @user -N — Adjust TVcoins (admin only)
@@ -572,7 +725,7 @@ async def tvchange(update: Update, context: ContextTypes.DEFAULT_TYPE):
     delta_s = context.args[1]
 
     # Validate the number format
-    if not re.fullmatch(r'[+-]\d+', delta_s):
+    if not _DELTA_RE.fullmatch(delta_s):
         return await update.message.reply_text(
             "Error: second argument must be +<number> or -<number>."
         )
@@ -592,7 +745,7 @@ async def tvchange(update: Update, context: ContextTypes.DEFAULT_TYPE):
     new_tv = max(old_tv + delta, 0)
     user_rec['twcoin'] = new_tv
 
-    save_data(data)
+    mark_dirty()
     await update.message.reply_text(
         f"✅ TVcoins of <b>{user_rec.get('username','')}</b> changed: {old_tv} → {new_tv}.",
         parse_mode="HTML"
@@ -637,6 +790,12 @@ def main():
 
     job_queue: JobQueue = app.job_queue
 
+    # Persist the in-memory data blob every couple of seconds if something
+    # changed. Handlers only flip the dirty flag, so a burst of /payto or
+    # message rewards still costs at most one disk write per interval, and
+    # an unclean shutdown loses no more than ~2s of changes.
+    job_queue.run_repeating(_flush_data_job, interval=2.0, first=2.0)
+
     # Register all command handlers
     app.add_handler(CommandHandler('voxstart', start))
     app.add_handler(CommandHandler('voxbalance', balance))
@@ -674,7 +833,6 @@ def main():
         app.run_polling(allowed_updates=Update.ALL_TYPES)
     except Exception:
         logging.exception('Unexpected error in bot polling')
-        time.sleep(1.5)
 
 if __name__ == '__main__':
     main()  # Runs the bot when you launch this file
\ No newline at end of file